@@ -0,0 +1,96 @@
+"""Serialization micro-benchmark of JSON backends.
+
+Encodes typical payload shapes with each installed backend of
+`bocadillo.json_backends` and reports the time per call.
+
+Usage:
+
+    python benchmarks/json_backends.py [--number N]
+"""
+import argparse
+import datetime
+import decimal
+import timeit
+import uuid
+from dataclasses import dataclass
+
+from bocadillo.json_backends import PREFERRED_BACKENDS, get_backend
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    price: float
+
+
+def _record(i: int) -> dict:
+    return {
+        'id': i,
+        'name': f'user-{i}',
+        'email': f'user-{i}@example.com',
+        'active': i % 2 == 0,
+        'score': i * 1.5,
+        'tags': ['a', 'b', 'c'],
+    }
+
+
+def _nested(depth: int) -> dict:
+    node = {'value': 0}
+    for i in range(depth):
+        node = {'value': i, 'children': [node, {'value': -i}]}
+    return node
+
+
+PAYLOADS = {
+    'small object': {'status': 'ok', 'id': 42, 'message': 'Hello, world!'},
+    'list of 1000 records': [_record(i) for i in range(1000)],
+    'nested (depth 12)': _nested(12),
+    'long strings': {'text': 'lorem ipsum dolor sit amet ' * 2000},
+    'unicode strings': {'text': 'héllo wörld ☃ ' * 500},
+    'numbers': list(range(10000)) + [i / 7 for i in range(10000)],
+    'non-native types': [
+        {
+            'created': datetime.datetime(2019, 1, 1, 12, i % 60),
+            'uuid': uuid.UUID(int=i),
+            'amount': decimal.Decimal('19.99'),
+            'item': Item(id=i, name='pen', price=1.5),
+        }
+        for i in range(200)
+    ],
+}
+
+
+def _available_backends():
+    for name in PREFERRED_BACKENDS:
+        try:
+            yield get_backend(name)
+        except ImportError:
+            continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--number', type=int, default=None,
+        help='Calls per measurement (default: calibrated per payload).',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    backends = list(_available_backends())
+    print(f'Backends: {", ".join(backend.name for backend in backends)}')
+
+    for shape, payload in PAYLOADS.items():
+        print(f'\n{shape}')
+        for backend in backends:
+            timer = timeit.Timer(lambda: backend.dumps(payload))
+            number = args.number or timer.autorange()[0]
+            best = min(timer.repeat(repeat=args.repeat, number=number))
+            usec = best / number * 1e6
+            size = len(backend.dumps(payload))
+            print(f'  {backend.name:<10} {usec:>12.2f} us/call {size:>10} B')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of a CPU-bound view, depending on the number of worker processes.
+
+A view which computes prime numbers (pure Python, so it holds the GIL) is run
+in the default thread pool, then in process pools with 1, 2, 4... workers up
+to the number of CPUs. Requests are sent concurrently to the ASGI app, so no
+server is involved.
+
+Usage:
+
+    python benchmarks/processes.py [--requests N] [--limit N]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from bocadillo import API
+
+# Upper bound of primes computed by each request.
+LIMIT = 20000
+
+
+def count_primes(req, res):
+    limit = int(req.query_params.get('limit', LIMIT))
+    count = 0
+    for n in range(2, limit):
+        if all(n % d for d in range(2, int(n ** 0.5) + 1)):
+            count += 1
+    res.media = {'count': count}
+
+
+def _create_api(workers: int = None) -> API:
+    # NOTE: `count_primes` is not reassigned, so that worker processes
+    # import the plain function.
+    api = API(static_dir=None)
+    if workers is None:
+        api.route('/')(count_primes)
+    else:
+        api.add_executor('workers', max_workers=workers, processes=True)
+        api.route('/', executor='workers')(count_primes)
+    return api
+
+
+async def _request(api: API, limit: int) -> int:
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'server': ('bench', 80),
+        'client': ('bench', 1234),
+        'root_path': '',
+        'path': '/',
+        'query_string': f'limit={limit}'.encode(),
+        'headers': [(b'host', b'bench')],
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await api(scope)(receive, send)
+    return status
+
+
+async def _measure(api: API, requests: int, limit: int) -> float:
+    # Warm up, e.g. to start worker processes.
+    await asyncio.gather(*(_request(api, limit) for _ in range(4)))
+    start = time.perf_counter()
+    statuses = await asyncio.gather(
+        *(_request(api, limit) for _ in range(requests))
+    )
+    elapsed = time.perf_counter() - start
+    assert set(statuses) == {200}, statuses
+    return requests / elapsed
+
+
+def _worker_counts():
+    cpus = os.cpu_count() or 1
+    count = 1
+    while count < cpus:
+        yield count
+        count *= 2
+    yield cpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--limit', type=int, default=LIMIT)
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    print(f'CPUs: {os.cpu_count()}, requests: {args.requests}\n')
+
+    api = _create_api()
+    baseline = loop.run_until_complete(
+        _measure(api, args.requests, args.limit)
+    )
+    print(f'{"threads":<12} {baseline:>10.1f} req/s')
+
+    for workers in _worker_counts():
+        api = _create_api(workers)
+        try:
+            throughput = loop.run_until_complete(
+                _measure(api, args.requests, args.limit)
+            )
+        finally:
+            api.shutdown_executors()
+        print(
+            f'{f"{workers} worker(s)":<12} {throughput:>10.1f} req/s '
+            f'(x{throughput / baseline:.2f})'
+        )
+
+
+if __name__ == '__main__':
+    main()
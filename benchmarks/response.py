@@ -0,0 +1,186 @@
+"""Per-request cost of building and sending responses.
+
+Compares `bocadillo.response.Response`, which writes ASGI messages itself,
+with the previous implementation (reproduced below), which routed every
+attribute assignment through `__setattr__` and built a starlette `Response`
+to send the content.
+
+For each kind of response, reports the time per request, and the number of
+memory blocks (and bytes) allocated per request. Allocations are counted by
+diffing `tracemalloc` snapshots taken before and after building and sending
+a batch of responses, which are kept alive along with the messages they sent.
+
+Note: unlike the previous implementation, `res.media` negotiates the media
+type using the request's `Accept` header, estimates the size of the value
+to decide whether to serialize it in the thread pool, and adds a `Vary`
+header. This work is included in the results, so `res.media` is not faster
+than before, unlike other kinds of responses.
+
+Usage:
+
+    python benchmarks/response.py [--requests N]
+"""
+import argparse
+import time
+import tracemalloc
+
+from starlette.requests import Request
+from starlette.responses import Response as StarletteResponse
+
+from bocadillo.media import Media
+from bocadillo.response import Response
+
+
+class LegacyResponse:
+    """The response builder before it wrote ASGI messages directly."""
+
+    def __init__(self, request: Request, media: Media):
+        self.request = request
+        self._content = None
+        self.status_code = None
+        self.headers = {}
+        self._media = media
+
+    def _set_media(self, value, media_type: str):
+        content = self._media.serialize(value, media_type=media_type)
+        self.headers['content-type'] = media_type
+        self._content = content
+
+    def __setattr__(self, key, value):
+        if key == 'text':
+            self._set_media(value, media_type=Media.PLAIN_TEXT)
+        elif key == 'html':
+            self._set_media(value, media_type=Media.HTML)
+        elif key == 'media':
+            self._set_media(value, media_type=self._media.type)
+        elif key == 'content':
+            self._content = value
+        else:
+            super().__setattr__(key, value)
+
+    async def __call__(self, receive, send):
+        if self.status_code is None:
+            self.status_code = 200
+        if self.status_code != 204:
+            self.headers.setdefault('content-type', Media.PLAIN_TEXT)
+        response = StarletteResponse(
+            content=self._content,
+            headers=self.headers,
+            status_code=self.status_code,
+        )
+        await response(receive, send)
+
+
+def _text(res):
+    res.text = 'Hello, world!'
+
+
+def _html(res):
+    res.status_code = 201
+    res.headers['x-request-id'] = 'abc123'
+    res.html = '<h1>Hello, world!</h1>'
+
+
+def _media(res):
+    res.media = {'id': 1, 'name': 'Bocadillo', 'tags': ['asgi', 'web']}
+
+
+def _content(res):
+    res.headers['content-type'] = 'application/octet-stream'
+    res.content = b'\x00' * 64
+
+
+VIEWS = {'text': _text, 'html': _html, 'media': _media, 'content': _content}
+
+SCOPE = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/',
+    'query_string': b'',
+    'headers': [(b'accept', b'application/json')],
+}
+
+
+async def _receive():
+    return {'type': 'http.request', 'body': b''}
+
+
+async def _respond(response_cls, view, media: Media, sent: list):
+    async def send(message):
+        sent.append(message)
+
+    res = response_cls(Request(SCOPE), media)
+    view(res)
+    await res(_receive, send)
+    return res
+
+
+def _run(coro):
+    # Nothing is actually awaited, so no event loop is needed.
+    try:
+        coro.send(None)
+    except StopIteration as exc:
+        return exc.value
+    else:  # pragma: no cover
+        raise RuntimeError('Response awaited something')
+
+
+def _count_allocations(response_cls, view, media: Media, requests: int):
+    # Pre-allocate containers so that only the responses and the messages
+    # they sent are counted.
+    responses = [None] * requests
+    sent = [[] for _ in range(requests)]
+    snapshot_filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(snapshot_filters)
+    for i in range(requests):
+        responses[i] = _run(_respond(response_cls, view, media, sent[i]))
+    after = tracemalloc.take_snapshot().filter_traces(snapshot_filters)
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / requests, size / requests
+
+
+def _measure(response_cls, view, requests: int):
+    media = Media(Media.JSON)
+    # Warm up caches (e.g. negotiated media types).
+    _run(_respond(response_cls, view, media, []))
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        _run(_respond(response_cls, view, media, []))
+    usec = (time.perf_counter() - start) / requests * 1e6
+
+    blocks, size = _count_allocations(response_cls, view, media, 1000)
+    return usec, blocks, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f'{"":<18} {"us/request":>12} {"blocks":>8} {"bytes":>8}')
+    for name, view in VIEWS.items():
+        legacy = _measure(LegacyResponse, view, args.requests)
+        current = _measure(Response, view, args.requests)
+        for label, (usec, blocks, size) in (
+            ('legacy', legacy),
+            ('current', current),
+        ):
+            print(
+                f'{name + " " + label:<18} {usec:>12.2f} '
+                f'{blocks:>8.1f} {size:>8.0f}'
+            )
+        print(
+            f'{"":<18} {current[0] / legacy[0] - 1:>+12.0%} '
+            f'{current[1] / legacy[1] - 1:>+8.0%} '
+            f'{current[2] / legacy[2] - 1:>+8.0%}'
+        )
+
+if __name__ == '__main__':
+    main()
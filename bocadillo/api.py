@@ -1,7 +1,8 @@
 """The Bocadillo API class."""
+import hashlib
 import inspect
 import os
-from contextlib import contextmanager
+import posixpath
 from http import HTTPStatus
 from typing import (
     Optional,
@@ -9,36 +10,60 @@ from typing import (
     Type,
     List,
     Dict,
-    Any,
     Union,
     Coroutine,
     Callable,
+    AsyncIterator,
 )
 
 from asgiref.wsgi import WsgiToAsgi
-from jinja2 import FileSystemLoader
+from jinja2 import BytecodeCache, FileSystemLoader
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.testclient import TestClient
 from uvicorn.main import run, get_logger
 from uvicorn.reloaders.statreload import StatReload
 
+from .cache import CacheInfo, LRUCache
 from .checks import check_route
-from .compat import call_all_async
+from .compat import is_wsgi_app
 from .constants import ALL_HTTP_METHODS
+from .converters import Converter, ConverterFunction, get_default_converters
 from .cors import DEFAULT_CORS_CONFIG
-from .error_handlers import ErrorHandler, handle_http_error
-from .exceptions import HTTPError
+from .error_handlers import NOT_FOUND, ErrorHandler, handle_http_error
+from .exceptions import HTTPError, RouteDeclarationError
+from .executors import (
+    DEFAULT as DEFAULT_EXECUTOR,
+    PROCESS as PROCESS_EXECUTOR,
+    Executor,
+    ProcessExecutor,
+    ThreadExecutor,
+    get_default_executors,
+)
+from .fragment_cache import FragmentCache
 from .hooks import HookFunction
-from .media import Media
+from .media import Media, OffloadStats
 from .middleware import CommonMiddleware, RoutingMiddleware
+from .mounts import MountIndex
 from .redirection import Redirection
 from .request import Request
 from .response import Response
 from .route import Route
-from .static import static
-from .templates import Template, get_templates_environment
+from .router import Router
+from .static import StaticFiles, static
+from .templates import (
+    Template,
+    get_bytecode_cache,
+    get_default_bytecode_cache,
+    get_sync_environment,
+    get_templates_environment,
+    set_bytecode_cache,
+    set_fragment_cache,
+    stream_template,
+)
+from .view import get_view_name
 from .types import ASGIApp, WSGIApp, ASGIAppInstance
 
 
@@ -89,6 +114,33 @@ class API:
         Can be one of the supported media types.
         Defaults to `'application/json'`.
         See also [Media](../topics/request-handling/media.md).
+    route_cache_size (int):
+        The maximum number of URL paths whose matching route (and route
+        parameters) are cached. The same number of paths which match no
+        route are cached separately.
+        Defaults to `0` (no caching).
+    executor (str):
+        The name of the executor used to run synchronous views, unless
+        specified otherwise on the route.
+        Built-in executors are `'default'` (a thread pool shared by all
+        routes), `'inline'` (run directly on the event loop) and `'process'`
+        (a pool of worker processes, for CPU-bound views).
+        See also #API.add_executor().
+        Defaults to `'default'`.
+    max_body_size (int):
+        The maximum size of request bodies, in bytes. Larger bodies are
+        rejected with a `413 Payload Too Large` error before being read
+        entirely.
+        Defaults to `None` (no limit).
+    template_string_cache_size (int):
+        The maximum number of templates given to #API.template_string()
+        which are kept compiled.
+        Defaults to `128`.
+    templates_auto_reload (bool):
+        Whether to check if template files have changed before rendering them,
+        and reload them if so. Set to `False` in production to avoid a
+        filesystem access on each render.
+        Defaults to `True`.
 
     # Attributes
 
@@ -99,12 +151,31 @@ class API:
     media_handlers (dict):
         The dictionary of supported media handlers.
         You can access, edit or replace this at will.
+    media_decoders (dict):
+        The dictionary of media decoders used by `await req.media()`,
+        which maps a content type to a `(bytes) -> Any` function.
+        You can access, edit or replace this at will.
     templates_dir (str):
         The absolute path where templates are searched for (built from the
         `templates_dir` parameter).
+    templates_fragment_cache (FragmentCache):
+        Where fragments rendered by the `{% cache %}` template tag are stored.
+        Defaults to an in-process #~some.fragment_cache.LocalFragmentCache.
+    templates_bytecode_cache (jinja2.BytecodeCache):
+        Where compiled templates are stored, so that they are only compiled
+        once across processes and restarts. Defaults to a filesystem cache
+        in the system's temporary directory (see `boca templates:compile`).
+        Set to `None` to disable.
+    converters (dict):
+        The dictionary of route parameter converters, which maps a name
+        (used as format specifier in route patterns) to a #~some.converters.Converter.
+        See also #API.add_converter().
+    executors (dict):
+        The dictionary of executors which can run synchronous views.
+        See also #API.add_executor().
     """
 
-    _error_handlers: List[Tuple[Type[Exception], ErrorHandler]]
+    _error_handlers: Dict[Type[Exception], ErrorHandler]
 
     def __init__(
         self,
@@ -116,26 +187,47 @@ class API:
         cors_config: dict = None,
         enable_hsts: bool = False,
         media_type: Optional[str] = Media.JSON,
+        route_cache_size: int = 0,
+        executor: str = DEFAULT_EXECUTOR,
+        max_body_size: int = None,
+        templates_auto_reload: bool = True,
+        template_string_cache_size: int = 128,
     ):
-        self._routes: Dict[str, Route] = {}
+        self._router = Router(cache_size=route_cache_size)
+        self.converters: Dict[str, Converter] = get_default_converters()
+        self.executors: Dict[str, Executor] = get_default_executors()
+        self.executor = executor
+        self.max_body_size = max_body_size
         self._named_routes: Dict[str, Route] = {}
 
-        self._error_handlers = []
+        self._error_handlers = {}
+        # Exception class -> resolved handler (or `None`).
+        self._error_handlers_cache: Dict[
+            Type[Exception], Optional[ErrorHandler]
+        ] = {}
         self.add_error_handler(HTTPError, handle_http_error)
 
         self._templates = get_templates_environment(
-            [os.path.abspath(templates_dir)]
+            [os.path.abspath(templates_dir)],
+            bytecode_cache=get_default_bytecode_cache(),
+            auto_reload=templates_auto_reload,
         )
         self._templates.globals.update(self._get_template_globals())
+        self._templates_sync = get_sync_environment(self._templates)
+        # Hash of source -> compiled template.
+        self._template_strings = LRUCache(maxsize=template_string_cache_size)
 
-        self._extra_apps: Dict[str, Any] = {}
+        self._mounts = MountIndex()
 
         self.client = self._build_client()
 
+        self._static: Optional[StaticFiles] = None
         if static_dir is not None:
             if static_root is None:
                 static_root = static_dir
-            self.mount(static_root, static(static_dir))
+            self._static = static(static_dir)
+            self.mount(static_root, self._static)
+        self._static_root = '/' + (static_root or '').strip('/')
 
         if allowed_hosts is None:
             allowed_hosts = ['*']
@@ -164,13 +256,20 @@ class API:
     def mount(self, prefix: str, app: Union[ASGIApp, WSGIApp]):
         """Mount another WSGI or ASGI app at the given prefix.
 
+        If several apps are mounted at prefixes of a path, the longest
+        prefix wins. Prefixes only match whole path segments, e.g. `'/myapp'`
+        matches `/myapp/foo` but not `/myappfoo`.
+
         # Parameters
         prefix (str): A path prefix where the app should be mounted, e.g. `'/myapp'`.
         app: An object implementing [WSGI](https://wsgi.readthedocs.io) or [ASGI](https://asgi.readthedocs.io) protocol.
         """
         if not prefix.startswith('/'):
             prefix = '/' + prefix
-        self._extra_apps[prefix] = app
+        if is_wsgi_app(app):
+            app = WsgiToAsgi(app)
+        self._mounts.add(prefix, app)
+        self._router.clear_cache()
 
     @property
     def media_type(self) -> str:
@@ -188,11 +287,33 @@ class API:
     def media_handlers(self, media_handlers: dict):
         self._media.handlers = media_handlers
 
+    @property
+    def media_decoders(self) -> dict:
+        return self._media.decoders
+
+    @media_decoders.setter
+    def media_decoders(self, media_decoders: dict):
+        self._media.decoders = media_decoders
+
+    def media_offload_stats(self) -> OffloadStats:
+        """Return statistics about serialization of `res.media` values.
+
+        # Returns
+        stats (OffloadStats):
+            How many values were serialized on the event loop (`inline`) and
+            in the thread pool (`offloaded`).
+        """
+        return self._media.offload_stats()
+
     def add_error_handler(
         self, exception_cls: Type[Exception], handler: ErrorHandler
     ):
         """Register a new error handler.
 
+        When an exception is raised, the handler registered for the closest
+        class in the exception's MRO is used, e.g. a handler for `KeyError`
+        takes precedence over a handler for `Exception`.
+
         # Parameters
         exception_cls (Exception class):
             The type of exception that should be handled.
@@ -201,7 +322,8 @@ class API:
             `exception_cls` is caught.
             Should accept a `req`, a `res` and an `exc`.
         """
-        self._error_handlers.insert(0, (exception_cls, handler))
+        self._error_handlers[exception_cls] = handler
+        self._error_handlers_cache.clear()
 
     def error_handler(self, exception_cls: Type[Exception]):
         """Register a new error handler (decorator syntax).
@@ -222,44 +344,161 @@ class API:
 
         return wrapper
 
-    def _find_handlers(self, exception):
-        return (
-            handler
-            for err_type, handler in self._error_handlers
-            if isinstance(exception, err_type)
-        )
+    def _find_handler(
+        self, exception_cls: Type[Exception]
+    ) -> Optional[ErrorHandler]:
+        try:
+            return self._error_handlers_cache[exception_cls]
+        except KeyError:
+            pass
+        handler = None
+        for cls in exception_cls.__mro__:
+            if cls in self._error_handlers:
+                handler = self._error_handlers[cls]
+                break
+        self._error_handlers_cache[exception_cls] = handler
+        return handler
 
     def _handle_exception(self, request, response, exception) -> None:
         """Handle an exception raised during dispatch.
 
-        At most one handler is called for the exception: the first one
-        to support it.
+        At most one handler is called for the exception: the one registered
+        for the closest class in the exception's MRO.
 
         If no handler was registered for the exception, it is raised.
         """
-        for handler in self._find_handlers(exception):
-            handler(request, response, exception)
-            break
-        else:
+        handler = self._find_handler(type(exception))
+        if handler is None:
             raise exception from None
+        handler(request, response, exception)
+
+    def add_converter(
+        self,
+        name: str,
+        regex: str,
+        convert: ConverterFunction = str,
+        spans_segments: bool = False,
+    ):
+        """Register a new route parameter converter.
+
+        Converters must be registered before declaring the routes that use them.
+
+        # Parameters
+        name (str):
+            The name of the converter, used as format specifier in
+            route patterns, e.g. `'{pk:name}'`.
+        regex (str):
+            A regular expression that raw values must match.
+        convert (callable):
+            A `(str) -> Any` function that converts raw values.
+            If it raises a `ValueError`, the route does not match.
+            Defaults to `str`.
+        spans_segments (bool):
+            Whether values can contain slashes.
+            Defaults to `False`.
+        """
+        self.converters[name] = Converter(
+            regex=regex, convert=convert, spans_segments=spans_segments
+        )
+
+    def converter(self, name: str, regex: str, spans_segments: bool = False):
+        """Register a new route parameter converter (decorator syntax).
+
+        # Example
+        ```python
+        >>> import bocadillo
+        >>> api = bocadillo.API()
+        >>> @api.converter('year', r'\\d{4}')
+        ... def to_year(value):
+        ...     return int(value)
+        ```
+        """
+
+        def wrapper(convert: ConverterFunction):
+            self.add_converter(
+                name, regex, convert=convert, spans_segments=spans_segments
+            )
+            return convert
+
+        return wrapper
+
+    def add_executor(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int = None,
+        processes: bool = False,
+    ) -> Executor:
+        """Register a dedicated thread pool to run synchronous views.
+
+        Use it to prevent slow views from starving other routes,
+        by passing `executor=name` to #API.route().
+
+        # Parameters
+        name (str): the name of the executor.
+        max_workers (int): the number of threads (or processes) in the pool.
+        max_queue (int):
+            The maximum number of calls waiting for a worker.
+            When it is reached, new requests are rejected with a
+            `503 Service Unavailable` error.
+            Defaults to no limit.
+        processes (bool):
+            Whether to use a pool of worker processes instead of threads.
+            Use this for CPU-bound views. Such views must be defined at the
+            top level of a module.
+            Defaults to `False`.
+
+        # Returns
+        executor (Executor):
+            The new executor, whose `.stats()` method reports how many
+            calls are running and queued.
+        """
+        executor_cls = ProcessExecutor if processes else ThreadExecutor
+        executor = executor_cls(
+            name, max_workers=max_workers, max_queue=max_queue
+        )
+        self.executors[name] = executor
+        return executor
+
+    def _get_executor(self, name: Optional[str], view_name: str) -> Executor:
+        if name is None:
+            name = self.executor
+        try:
+            return self.executors[name]
+        except KeyError:
+            raise RouteDeclarationError(
+                f'Route "{view_name}" uses executor "{name}" but it was '
+                f'not registered (available: {", ".join(self.executors)}).'
+            ) from None
 
     def route(
-        self, pattern: str, *, methods: List[str] = None, name: str = None
+        self,
+        pattern: str,
+        *,
+        methods: List[str] = None,
+        name: str = None,
+        executor: str = None,
     ):
         """Register a new route by decorating a view.
 
         # Parameters
         pattern (str):
-            An URL pattern given as a format string.
+            An URL pattern given as a format string. Route parameters
+            can use converters as format specifiers, e.g. `'{pk:int}'`.
         methods (list of str):
             HTTP methods supported by this route.
             Defaults to all HTTP methods.
             Ignored for class-based views.
         name (str):
             A name for this route, which must be unique.
+        executor (str):
+            The name of the executor used to run the view if it is
+            synchronous. Defaults to the API's `executor`.
 
         # Raises
-        RouteDeclarationError: if the internal call to #checks.check_route() fails.
+        RouteDeclarationError:
+            if the internal call to #checks.check_route() fails,
+            or if the pattern uses an unknown converter.
 
         # Example
         ```python
@@ -289,10 +528,16 @@ class API:
                     ]
             check_route(pattern, view, methods)
             route = Route(
-                pattern=pattern, view=view, methods=methods, name=name
+                pattern=pattern,
+                view=view,
+                methods=methods,
+                name=name,
+                converters=self.converters,
+                executor=self._get_executor(executor, get_view_name(view)),
+                process_executor=self.executors.get(PROCESS_EXECUTOR),
             )
 
-            self._routes[pattern] = route
+            self._router.add(route)
             if name is not None:
                 self._named_routes[name] = route
 
@@ -328,13 +573,21 @@ class API:
         """
         return Route.after_hook(hook_function, *args, **kwargs)
 
-    def _find_matching_route(self, path: str) -> Tuple[Optional[str], dict]:
+    def _find_matching_route(self, path: str) -> Tuple[Optional[Route], dict]:
         """Find a route matching the given path."""
-        for pattern, route in self._routes.items():
-            kwargs = route.match(path)
-            if kwargs is not None:
-                return pattern, kwargs
-        return None, {}
+        return self._router.match(path)
+
+    def route_cache_info(self) -> Dict[str, CacheInfo]:
+        """Return statistics about the route resolution cache.
+
+        See also the `route_cache_size` parameter.
+
+        # Returns
+        info (dict):
+            A #~some.cache.CacheInfo for matched paths (under `'found'`)
+            and for paths which match no route (under `'not_found'`).
+        """
+        return self._router.cache_info()
 
     def _get_route_or_404(self, name: str):
         try:
@@ -386,8 +639,25 @@ class API:
             assert url is not None, 'url is expected if no route name is given'
         raise Redirection(url=url, permanent=permanent)
 
+    def static_url(self, path: str) -> str:
+        """Return the URL path of a static file.
+
+        If a manifest was built (see `boca static:build`), the URL of the
+        fingerprinted copy of the file is returned.
+
+        # Parameters
+        path (str): a path relative to `static_dir`, e.g. `'css/app.css'`.
+
+        # Returns
+        url (str): the URL path of the file, e.g. `'/static/css/app.css'`.
+        """
+        path = path.lstrip('/')
+        if self._static is not None:
+            path = self._static.url(path)
+        return posixpath.join(self._static_root, path)
+
     def _get_template_globals(self) -> dict:
-        return {'url_for': self.url_for}
+        return {'url_for': self.url_for, 'static_url': self.static_url}
 
     @property
     def templates_dir(self) -> str:
@@ -399,29 +669,26 @@ class API:
         loader: FileSystemLoader = self._templates.loader
         loader.searchpath = [os.path.abspath(templates_dir)]
 
-    def _get_template(self, name: str) -> Template:
-        return self._templates.get_template(name)
+    @property
+    def templates_bytecode_cache(self) -> Optional[BytecodeCache]:
+        return get_bytecode_cache(self._templates)
 
-    @contextmanager
-    def _prevent_async_template_rendering(self):
-        """If enabled, temporarily disable async template rendering.
+    @templates_bytecode_cache.setter
+    def templates_bytecode_cache(self, cache: Optional[BytecodeCache]):
+        set_bytecode_cache(self._templates, cache)
+        set_bytecode_cache(self._templates_sync, cache)
 
-        Notes
-        -----
-        Hot fix for a bug with Jinja2's async environment, which always
-        renders asynchronously even under `render()`.
-        Example error:
-        `RuntimeError: There is no current event loop in thread [...]`
-        """
-        if not self._templates.is_async:
-            yield
-            return
+    @property
+    def templates_fragment_cache(self) -> FragmentCache:
+        return self._templates.fragment_cache
 
-        self._templates.is_async = False
-        try:
-            yield
-        finally:
-            self._templates.is_async = True
+    @templates_fragment_cache.setter
+    def templates_fragment_cache(self, cache: FragmentCache):
+        set_fragment_cache(self._templates, cache)
+        set_fragment_cache(self._templates_sync, cache)
+
+    def _get_template(self, name: str) -> Template:
+        return self._templates.get_template(name)
 
     @staticmethod
     def _prepare_context(context: dict = None, **kwargs):
@@ -451,29 +718,63 @@ class API:
         context = self._prepare_context(context, **kwargs)
         return await self._get_template(name_).render_async(context)
 
+    def template_stream(
+        self, name_: str, context: dict = None, **kwargs
+    ) -> AsyncIterator[bytes]:
+        """Render a template asynchronously, as a stream of chunks.
+
+        The returned stream can be given to `res.stream`, so that the
+        beginning of the page is sent while the rest is being rendered.
+        Chunks are at least `bocadillo.templates.STREAM_CHUNK_SIZE` characters
+        long (except the last one).
+
+        For parameters, see #API.template().
+
+        # Returns
+        chunks (async iterator): UTF-8 encoded chunks of the rendered template.
+        """
+        context = self._prepare_context(context, **kwargs)
+        return stream_template(self._get_template(name_), context)
+
     def template_sync(self, name_: str, context: dict = None, **kwargs) -> str:
         """Render a template synchronously.
 
         See also: #API.template().
         """
         context = self._prepare_context(context, **kwargs)
-        with self._prevent_async_template_rendering():
-            return self._get_template(name_).render(context)
+        return self._templates_sync.get_template(name_).render(context)
 
     def template_string(
         self, source: str, context: dict = None, **kwargs
     ) -> str:
         """Render a template from a string (synchronous).
 
+        Compiled templates are cached, so rendering the same source again
+        doesn't compile it again (see the `template_string_cache_size`
+        parameter).
+
         # Parameters
         source (str): a template given as a string.
 
         For other parameters, see #API.template().
         """
         context = self._prepare_context(context, **kwargs)
-        with self._prevent_async_template_rendering():
-            template = self._templates.from_string(source=source)
-            return template.render(context)
+        return self._get_template_from_string(source).render(context)
+
+    def _get_template_from_string(self, source: str) -> Template:
+        key = hashlib.sha1(source.encode()).digest()
+        template = self._template_strings.get(key)
+        if template is None:
+            template = self._templates_sync.from_string(source=source)
+            self._template_strings.set(key, template)
+        return template
+
+    def template_string_cache_info(self) -> CacheInfo:
+        """Return statistics about compiled templates given as strings.
+
+        See also the `template_string_cache_size` parameter.
+        """
+        return self._template_strings.info()
 
     def _is_routing_middleware(self, middleware_cls) -> bool:
         return hasattr(middleware_cls, 'dispatch')
@@ -497,8 +798,8 @@ class API:
     async def dispatch(
         self,
         request: Request,
-        before: List[Callable] = None,
-        after: List[Callable] = None,
+        before: Tuple[Callable[..., Coroutine], ...] = (),
+        after: Tuple[Callable[..., Coroutine], ...] = (),
     ) -> Response:
         """Dispatch a request and return a response.
 
@@ -507,33 +808,41 @@ class API:
 
         # Parameters
         request (Request): an inbound HTTP request.
-        before (list of callables): a list of middleware `before_dispatch` hooks.
-        after (list of callables): a list of middleware `after_dispatch` hooks.
+        before (tuple of coroutine functions):
+            Middleware `before_dispatch` callbacks.
+        after (tuple of coroutine functions):
+            Middleware `after_dispatch` callbacks.
 
         # Returns
         response (Response): an HTTP response.
         """
-        if before is None:
-            before = []
-        if after is None:
-            after = []
-
         response = Response(request, media=self._media)
 
-        try:
-            pattern, kwargs = self._find_matching_route(request.url.path)
-            route = self._routes.get(pattern)
-            if route is None:
+        route, kwargs = self._find_matching_route(request.url.path)
+        if route is None:
+            # Fast path: no need to raise and catch an exception.
+            handler = self._find_handler(HTTPError)
+            if handler is None:
                 raise HTTPError(status=404)
+            handler(request, response, NOT_FOUND)
+            await response.serialize_media()
+            return response
+
+        try:
             route.raise_for_method(request)
             try:
-                await call_all_async(before, request)
+                for callback in before:
+                    await callback(request)
                 await route(request, response, **kwargs)
-                await call_all_async(after, request, response)
+                for callback in after:
+                    await callback(request, response)
+                # Serialize here so that errors can be handled.
+                await response.serialize_media()
             except Redirection as redirection:
                 response = redirection.response
         except Exception as e:
             self._handle_exception(request, response, e)
+            await response.serialize_media()
 
         return response
 
@@ -551,23 +860,42 @@ class API:
             An ASGI application instance
             (either `self` or an instance of a sub-app).
         """
+        if scope['type'] == 'lifespan':
+            return self._handle_lifespan
+
         path: str = scope['path']
 
         # Return a sub-mounted extra app, if found
-        for prefix, app in self._extra_apps.items():
-            if not path.startswith(prefix):
-                continue
+        mount = self._mounts.match(path)
+        if mount is not None:
+            prefix, app = mount
             # Remove prefix from path so that the request is made according
             # to the mounted app's point of view.
             scope['path'] = path[len(prefix) :]
-            try:
-                return app(scope)
-            except TypeError:
-                app = WsgiToAsgi(app)
-                return app(scope)
+            return app(scope)
 
         return self._common_middleware(scope)
 
+    async def _handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Waiting for worker processes to exit may take a while.
+                await run_in_threadpool(self.shutdown_executors)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown_executors(self):
+        """Release the resources held by executors (e.g. worker processes).
+
+        This is called automatically when the server shuts down, in the
+        thread pool so that waiting for workers doesn't block the event loop.
+        """
+        for executor in self.executors.values():
+            executor.shutdown()
+
     def run(
         self,
         host: str = None,
@@ -0,0 +1,88 @@
+"""Caching utilities."""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    """Statistics about a cache, similar to `functools.lru_cache()`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entries.
+
+    Caches are thread-safe, so that they can be used both from the event loop
+    and from sync views running in the thread pool.
+
+    # Parameters
+    maxsize (int):
+        The maximum number of entries. If `0`, nothing is ever stored.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for `key` (or `default`), and record a hit or miss."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def record_miss(self):
+        """Record a miss for a lookup that checked membership (`in`) instead
+        of calling `get()`."""
+        with self._lock:
+            self.misses += 1
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def expire(self, key: Hashable):
+        """Remove an entry that `get()` returned but which turned out to be
+        stale, and record that lookup as a miss instead of a hit."""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.hits -= 1
+                self.misses += 1
+
+    def clear(self):
+        """Remove all entries. Statistics are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=self.maxsize,
+                currsize=len(self._data),
+            )
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -3,7 +3,15 @@ import os
 from inspect import cleandoc
 from typing import List
 
+from jinja2 import TemplateSyntaxError
+
 from .ext import click
+from .static import MANIFEST_NAME, build_static
+from .templates import (
+    TEMPLATE_EXTENSIONS,
+    compile_templates,
+    get_default_bytecode_cache,
+)
 
 CUSTOM_COMMANDS_FILE_ENV_VAR = 'BOCA_CUSTOM_COMMANDS_FILE'
 
@@ -106,6 +114,58 @@ def create_cli() -> click.Command:
         click.echo(click.style(f'Generated {path}', fg='green'))
         click.echo('Open the file and start building!')
 
+    @builtin.command(name='static:build')
+    @click.option('-d', '--directory', default='static',
+                  help='The static files directory.')
+    @click.option('--compress/--no-compress', default=True,
+                  help='Write gzip (and brotli) variants of text files.')
+    def static_build(directory: str, compress: bool):
+        """Build fingerprinted and compressed static files."""
+        if not os.path.isdir(directory):
+            raise click.ClickException(f'No directory at: {directory}')
+        manifest = build_static(directory, compress=compress)
+        path = os.path.join(directory, MANIFEST_NAME)
+        click.echo(click.style(
+            f'Fingerprinted {len(manifest)} file(s), manifest: {path}',
+            fg='green',
+        ))
+
+    @builtin.command(name='templates:compile')
+    @click.option('-d', '--directory', default='templates',
+                  help='The templates directory.')
+    @click.option('-c', '--cache-dir', default=None,
+                  help='Where compiled templates are stored. '
+                       'Defaults to the default templates bytecode cache.')
+    @click.option('-e', '--ext', 'extensions', multiple=True,
+                  default=list(TEMPLATE_EXTENSIONS), show_default=True,
+                  help='Extension of files to compile (can be repeated).')
+    def templates_compile(directory: str, cache_dir: str, extensions):
+        """Compile templates ahead of time."""
+        if not os.path.isdir(directory):
+            raise click.ClickException(f'No directory at: {directory}')
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = get_default_bytecode_cache(cache_dir)
+        extensions = [ext.lstrip('.') for ext in extensions]
+        try:
+            names = compile_templates(
+                [os.path.abspath(directory)], bytecode_cache, extensions
+            )
+        except TemplateSyntaxError as exc:
+            raise click.ClickException(
+                f'{exc.filename}:{exc.lineno}: {exc.message}'
+            ) from exc
+        except UnicodeDecodeError as exc:
+            raise click.ClickException(
+                f'Template is not valid UTF-8: {exc}'
+            ) from exc
+        except OSError as exc:
+            raise click.ClickException(str(exc)) from exc
+        click.echo(click.style(
+            f'Compiled {len(names)} template(s) into {bytecode_cache.directory}',
+            fg='green',
+        ))
+
     custom = FileGroupCLI(
         file_name=get_custom_commands_file_path(),
     )
@@ -1,36 +1,52 @@
 import asyncio
-from typing import Callable, Coroutine, Iterable
+import inspect
+from typing import Callable, Coroutine
 
 from starlette.concurrency import run_in_threadpool
 
-from .types import WSGIApp
 
+def is_wsgi_app(app) -> bool:
+    """Return whether an app implements WSGI (rather than ASGI).
 
-def empty_wsgi_app() -> WSGIApp:
-    """Return a WSGI app that always returns 404 Not Found."""
-
-    def wsgi(environ, start_response):
-        status = '404 Not Found'
-        body = b'Not Found'
-        headers = [('Content-Type', 'text/plain')]
-        start_response(status, headers)
-        return [body]
-
-    return wsgi
+    WSGI apps accept exactly two positional arguments (`environ` and
+    `start_response`), while ASGI apps accept a single `scope`.
+    """
+    try:
+        parameters = inspect.signature(app).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [
+        parameter
+        for parameter in parameters
+        if parameter.kind
+        in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+        and parameter.default is parameter.empty
+    ]
+    return len(positional) == 2
+
+
+def is_async_callable(func: Callable) -> bool:
+    """Return whether calling `func` returns a coroutine.
+
+    Unlike `asyncio.iscoroutinefunction()`, this supports callable objects
+    whose `__call__()` method is `async`.
+    """
+    return asyncio.iscoroutinefunction(func) or (
+        not inspect.isfunction(func)
+        and asyncio.iscoroutinefunction(getattr(func, '__call__', None))
+    )
 
 
-async def call_async(func: Callable, *args, sync=False, **kwargs) -> Coroutine:
-    """Call a function in an async manner.
+def make_async(func: Callable) -> Callable[..., Coroutine]:
+    """Return an async version of a function.
 
-    If the function is synchronous (or the `sync` hint flag is set),
-    it is run in the asyncio thread pool.
+    Async functions (and callables) are returned as is, while sync ones
+    are wrapped so that they run in the asyncio thread pool.
     """
-    if sync or not asyncio.iscoroutinefunction(func):
-        return await run_in_threadpool(func, *args, **kwargs)
-    return await func(*args, **kwargs)
+    if is_async_callable(func):
+        return func
 
+    async def async_func(*args, **kwargs):
+        return await run_in_threadpool(func, *args, **kwargs)
 
-async def call_all_async(funcs: Iterable[Callable], *args, **kwargs):
-    """Call functions in an async manner (with the same arguments)."""
-    for func in funcs:
-        await call_async(func, *args, **kwargs)
+    return async_func
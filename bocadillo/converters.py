@@ -0,0 +1,53 @@
+"""Route parameter converters.
+
+A converter validates and converts the value of a route parameter.
+It is referenced by name in the format specifier of a route parameter,
+e.g. `{pk:int}`.
+"""
+from typing import Any, Callable, Dict, NamedTuple
+from uuid import UUID
+
+ConverterFunction = Callable[[str], Any]
+
+
+class Converter(NamedTuple):
+    """A route parameter converter.
+
+    # Attributes
+    regex (str):
+        A regular expression that raw values must match.
+    convert (callable):
+        A `(str) -> Any` function that converts a raw value.
+        If it raises a `ValueError`, the route does not match.
+        Defaults to `str`.
+    spans_segments (bool):
+        Whether values can contain slashes, i.e. span across
+        multiple path segments.
+        Defaults to `False`.
+    """
+
+    regex: str
+    convert: ConverterFunction = str
+    spans_segments: bool = False
+
+
+def get_default_converters() -> Dict[str, Converter]:
+    int_ = Converter(r'[+-]?\d+', int)
+    float_ = Converter(r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)', float)
+    return {
+        'str': Converter(r'[^/]+'),
+        'int': int_,
+        'd': int_,
+        'float': float_,
+        'f': float_,
+        'uuid': Converter(
+            r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+            r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}',
+            UUID,
+        ),
+        'slug': Converter(r'[-a-zA-Z0-9_]+'),
+        'path': Converter(r'.+', spans_segments=True),
+    }
+
+
+DEFAULT_CONVERTER = 'str'
@@ -1,14 +1,30 @@
 """Built-in error handlers."""
+from functools import lru_cache
+from http import HTTPStatus
+from types import MappingProxyType
 from typing import Callable
 
 from .exceptions import HTTPError
+from .media import Media
 from .request import Request
 from .response import Response
 
+# Shared instance used when no route matches, so that 404s
+# don't have to build (and raise) a new exception.
+NOT_FOUND = HTTPError(HTTPStatus.NOT_FOUND, headers=MappingProxyType({}))
+
+
+@lru_cache(maxsize=None)
+def render_http_error(status: HTTPStatus) -> bytes:
+    """Return the (cached) HTML body of the response to an HTTP error."""
+    return f'<h1>{status.value} {status.phrase}</h1>'.encode()
+
 
 def handle_http_error(_, res, exc: HTTPError):
     res.status_code = exc.status_code
-    res.html = f'<h1>{exc.status_code} {exc.status_phrase}</h1>'
+    res.headers.update(exc.headers)
+    res.headers['content-type'] = Media.HTML
+    res.content = render_http_error(exc.http_status)
 
 
 ErrorHandler = Callable[[Request, Response, Exception], None]
@@ -1,5 +1,5 @@
 from http import HTTPStatus
-from typing import Union
+from typing import Mapping, Union
 from jinja2.exceptions import TemplateNotFound as _TemplateNotFound
 
 # Alias
@@ -15,9 +15,17 @@ class HTTPError(Exception):
 
     You can raise this within a view or an error handler to interrupt
     request processing.
+
+    # Parameters
+    status (int or HTTPStatus): the HTTP status of the error.
+    headers (dict, optional): extra headers to send along with the error.
     """
 
-    def __init__(self, status: Union[int, HTTPStatus]):
+    def __init__(
+        self,
+        status: Union[int, HTTPStatus],
+        headers: Mapping[str, str] = None,
+    ):
         if isinstance(status, int):
             status = HTTPStatus(status)
         else:
@@ -25,6 +33,7 @@ class HTTPError(Exception):
                 status, HTTPStatus
             ), f'Expected int or HTTPStatus, got {type(status)}'
         self._status = status
+        self.headers = {} if headers is None else headers
 
     @property
     def http_status(self) -> HTTPStatus:
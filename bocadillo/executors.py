@@ -0,0 +1,227 @@
+"""Executors used to run synchronous views.
+
+Synchronous views cannot be awaited, so they must be run somewhere else
+than on the event loop — except when they are trivial enough. Bocadillo
+provides the following executors:
+
+- `'default'`: the event loop's default thread pool, shared by all routes.
+- `'inline'`: run views directly on the event loop. Only suitable
+for views that don't block nor perform CPU-intensive work.
+- `'process'`: a pool of worker processes, for CPU-bound views and hooks.
+See also #~some.processes.
+- Named thread or process pools registered via #API.add_executor(), which
+have their own number of workers and (optionally) a bounded queue.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from typing import Any, Callable, NamedTuple, Optional
+
+from .exceptions import HTTPError
+
+try:
+    import contextvars  # Python 3.7+ only.
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+DEFAULT = 'default'
+INLINE = 'inline'
+PROCESS = 'process'
+
+
+class ExecutorStats(NamedTuple):
+    """Statistics about an executor.
+
+    # Attributes
+    active (int): the number of calls currently running.
+    queued (int): the number of calls waiting for a worker.
+    max_workers (int): the number of workers, if known.
+    max_queue (int): the maximum number of queued calls, if any.
+    """
+
+    active: int
+    queued: int
+    max_workers: Optional[int]
+    max_queue: Optional[int]
+
+
+class Executor:
+    """Base class for executors.
+
+    Subclasses must implement `_submit()`.
+    """
+
+    max_workers: Optional[int] = None
+    max_queue: Optional[int] = None
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending = 0
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            active = self._active
+            pending = self._pending
+        return ExecutorStats(
+            active=active,
+            queued=pending - active,
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+        )
+
+    def _check_capacity(self):
+        if self.max_queue is None or self.max_workers is None:
+            return
+        if self._pending >= self.max_workers + self.max_queue:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def _run_tracked(self, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous function and return its result.
+
+        # Raises
+        HTTPError(503): if the executor's queue is full.
+        """
+        self._check_capacity()
+        with self._lock:
+            self._pending += 1
+        try:
+            return await self._submit(
+                partial(self._run_tracked, func, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def _submit(self, func: Callable[[], Any]) -> Any:
+        raise NotImplementedError
+
+    def shutdown(self):
+        """Release resources held by the executor."""
+
+
+class InlineExecutor(Executor):
+    """Run functions directly on the event loop."""
+
+    async def _submit(self, func: Callable[[], Any]) -> Any:
+        return func()
+
+
+class ThreadExecutor(Executor):
+    """Run functions in a thread pool.
+
+    # Parameters
+    name (str): the name of the executor.
+    max_workers (int, optional):
+        The number of threads. If not given, the event loop's default
+        thread pool is used.
+    max_queue (int, optional):
+        The maximum number of calls waiting for a thread. When it is reached,
+        new calls are rejected with a `503 Service Unavailable` error.
+        Defaults to no limit.
+    """
+
+    def __init__(
+        self, name: str, max_workers: int = None, max_queue: int = None
+    ):
+        super().__init__(name)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if max_workers is not None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f'bocadillo-{name}'
+            )
+
+    async def _submit(self, func: Callable[[], Any]) -> Any:
+        loop = asyncio.get_event_loop()
+        if contextvars is not None:  # pragma: no cover
+            # Run in the current context, like starlette's `run_in_threadpool()`.
+            func = partial(contextvars.copy_context().run, func)
+        return await loop.run_in_executor(self._pool, func)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+
+class ProcessExecutor(Executor):
+    """Run functions in a pool of worker processes.
+
+    Functions and their arguments must be picklable.
+    The pool is created on first use.
+
+    # Parameters
+    name (str): the name of the executor.
+    max_workers (int, optional):
+        The number of worker processes. Defaults to the number of CPUs.
+    max_queue (int, optional):
+        The maximum number of calls waiting for a worker. When it is reached,
+        new calls are rejected with a `503 Service Unavailable` error.
+        Defaults to no limit.
+    """
+
+    def __init__(
+        self, name: str, max_workers: int = None, max_queue: int = None
+    ):
+        super().__init__(name)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def stats(self) -> ExecutorStats:
+        # NOTE: we can't know when a call starts running in a worker process,
+        # so assume that calls run as soon as a worker is available.
+        active = min(self._pending, self.max_workers)
+        return ExecutorStats(
+            active=active,
+            queued=self._pending - active,
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+        )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a function in a worker process and return its result.
+
+        # Raises
+        HTTPError(503): if the executor's queue is full.
+        """
+        self._check_capacity()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        loop = asyncio.get_event_loop()
+        self._pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._pool, partial(func, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def get_default_executors() -> dict:
+    return {
+        DEFAULT: ThreadExecutor(DEFAULT),
+        INLINE: InlineExecutor(INLINE),
+        PROCESS: ProcessExecutor(PROCESS),
+    }
@@ -0,0 +1,128 @@
+"""Caching of rendered template fragments.
+
+The `{% cache %}` template tag stores the rendered content of its body under
+a key, optionally for a limited time (in seconds):
+
+```jinja
+{% cache 'sidebar', 300 %}
+    {{ expensive_sidebar() }}
+{% endcache %}
+```
+
+Keys are arbitrary expressions, e.g. `'sidebar-' ~ user.id`, and are shared
+by all templates. Fragments are stored as UTF-8 encoded bytes in a
+#~some.fragment_cache.FragmentCache backend.
+"""
+import time
+from typing import Optional
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import CacheInfo, LRUCache
+
+# Number of fragments kept by the default backend.
+DEFAULT_FRAGMENT_CACHE_SIZE = 1024
+
+
+class FragmentCache:
+    """Base class for fragment cache backends.
+
+    Backends can store fragments in-process, or in an external store shared
+    by all processes (e.g. Redis or Memcached).
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the fragment stored under `key`, or `None`."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float]):
+        """Store a fragment.
+
+        # Parameters
+        key (str): the key of the fragment.
+        value (bytes): the rendered fragment.
+        ttl (float):
+            How long the fragment is valid for, in seconds.
+            If `None`, the fragment does not expire.
+        """
+        raise NotImplementedError
+
+
+class LocalFragmentCache(FragmentCache):
+    """In-process fragment cache, which evicts the least recently used
+    fragments.
+
+    # Parameters
+    maxsize (int):
+        The maximum number of fragments.
+        Defaults to `DEFAULT_FRAGMENT_CACHE_SIZE`.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        # Key -> (expiry time or `None`, value).
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.monotonic():
+            self._cache.expire(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float]):
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._cache.set(key, (expires, value))
+
+    def clear(self):
+        self._cache.clear()
+
+    def info(self) -> CacheInfo:
+        return self._cache.info()
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension providing the `{% cache key[, ttl] %}` tag.
+
+    The backend is stored on the environment as `fragment_cache`.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=LocalFragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_cache', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache(self, key, ttl, caller):
+        key = str(key)
+        value = self.environment.fragment_cache.get(key)
+        if value is not None:
+            return Markup(value.decode())
+        if self.environment.is_async:
+            # In async mode, `caller()` is a coroutine, and so is the
+            # value returned here (Jinja awaits it).
+            return self._render_async(key, ttl, caller)
+        return self._store(key, ttl, caller())
+
+    async def _render_async(self, key, ttl, caller):
+        return self._store(key, ttl, await caller())
+
+    def _store(self, key: str, ttl, rendered: str) -> Markup:
+        self.environment.fragment_cache.set(key, rendered.encode(), ttl)
+        return Markup(rendered)
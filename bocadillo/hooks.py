@@ -1,13 +1,78 @@
-from typing import Callable, Optional
+from typing import Callable, Coroutine, Dict, List, NamedTuple, Optional
 
+from starlette.concurrency import run_in_threadpool
+
+from .compat import is_async_callable
+from .exceptions import RouteDeclarationError
+from .executors import ProcessExecutor
+from .processes import is_process_bound, run_hook
 from .request import Request
 from .response import Response
 
 HookFunction = Callable[[Request, Response, Optional[dict]], None]
+Hook = Callable[[Request, Response, dict], Coroutine]
 
 BEFORE = 'before'
 AFTER = 'after'
 
+# Attribute under which hooks are stored on decorated view functions.
+HOOKS_ATTRIBUTE = '__hooks__'
+
+
+class HookSpec(NamedTuple):
+    """A hook function, along with extra arguments to pass to it."""
+
+    function: HookFunction
+    args: tuple
+    kwargs: dict
+
+
+def create_hook(
+    spec: HookSpec, process_executor: ProcessExecutor = None
+) -> Hook:
+    """Build an async hook out of a (sync or async) hook function.
+
+    Async hook functions are awaited directly, sync ones are run
+    in the asyncio thread pool, and process-bound ones are run using
+    the `process_executor`.
+    """
+    hook_function, args, kwargs = spec
+
+    if is_process_bound(hook_function):
+        if process_executor is None:
+            raise RouteDeclarationError(
+                f'Hook "{hook_function.__name__}" is process-bound but '
+                'no process executor is available.'
+            )
+
+        async def hook(req, res, params):
+            await run_hook(
+                process_executor,
+                hook_function,
+                req,
+                res,
+                params,
+                *args,
+                **kwargs,
+            )
+
+    elif is_async_callable(hook_function):
+        if not args and not kwargs:
+            return hook_function
+
+        async def hook(req, res, params):
+            await hook_function(req, res, params, *args, **kwargs)
+
+    else:
+
+        async def hook(req, res, params):
+            await run_in_threadpool(
+                hook_function, req, res, params, *args, **kwargs
+            )
+
+    return hook
+
 
-def empty_hook(req, res, params):
-    pass
+def get_hooks(function: Callable) -> Dict[str, List[HookSpec]]:
+    """Return the hooks attached to a view function (possibly none)."""
+    return getattr(function, HOOKS_ATTRIBUTE, {BEFORE: [], AFTER: []})
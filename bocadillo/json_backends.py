@@ -0,0 +1,218 @@
+"""JSON encoding backends.
+
+Encoding JSON is a hot path for most APIs, so Bocadillo uses the fastest
+JSON library available, in this order:
+
+- [orjson](https://github.com/ijl/orjson)
+- [ujson](https://github.com/esnme/ultrajson)
+- [rapidjson](https://github.com/python-rapidjson/python-rapidjson)
+- The standard library's `json` module.
+
+Backends encode values to `bytes`, so that encoded values can be sent as is,
+and decode `bytes` directly, e.g. a request body. Values are encoded as
+compact UTF-8 JSON (no whitespace, non-ASCII characters are not escaped).
+
+Values which are not natively supported by JSON are converted as follows:
+
+- Dataclasses are converted to dicts.
+- Other mappings (e.g. the multi-dict of a parsed form) are converted to
+dicts, using the value returned by `mapping[key]` for each key.
+- Dates, times and datetimes are converted to ISO 8601 strings.
+- UUIDs and decimals are converted to strings.
+
+Faster libraries don't support everything the standard library does, e.g.
+orjson can't encode integers larger than 64 bits, rapidjson rejects
+non-string dictionary keys, and ujson encodes decimals as numbers. Values
+they fail to encode, or would encode differently, are encoded with the
+standard library instead, so that all backends produce the same output.
+"""
+import datetime
+import decimal
+import importlib
+import json
+import uuid
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+try:
+    import dataclasses  # Python 3.7+ only.
+except ImportError:  # pragma: no cover
+    dataclasses = None
+
+# Order in which backends are tried when none is specified.
+PREFERRED_BACKENDS = ('orjson', 'ujson', 'rapidjson', 'json')
+
+
+def default(value: Any) -> Any:
+    """Convert a value that the JSON library doesn't support natively.
+
+    # Raises
+    TypeError: if the value cannot be converted.
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if (
+        dataclasses is not None
+        and dataclasses.is_dataclass(value)
+        and not isinstance(value, type)
+    ):
+        return dataclasses.asdict(value)
+    if isinstance(value, Mapping):
+        return {key: value[key] for key in value}
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class JSONBackend(NamedTuple):
+    """A JSON library, along with functions to encode values to bytes
+    and decode bytes."""
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+# Types which every backend encodes like the standard library.
+_NATIVE_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _fallback_dumps(value: Any) -> bytes:
+    # Same output format as the faster libraries.
+    return json.dumps(
+        value, default=default, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+def _needs_fallback(value: Any) -> bool:
+    # Whether a value contains non-string keys or decimals, which ujson and
+    # rapidjson don't encode like the standard library.
+    cls = type(value)
+    if cls in _NATIVE_TYPES:
+        return False
+    if cls is dict:
+        for key, item in value.items():
+            if type(key) is not str or _needs_fallback(item):
+                return True
+        return False
+    if cls is list or cls is tuple:
+        for item in value:
+            if _needs_fallback(item):
+                return True
+        return False
+    if isinstance(value, decimal.Decimal):
+        return True
+    if isinstance(value, Mapping):
+        return any(
+            not isinstance(key, str) or _needs_fallback(value[key])
+            for key in value
+        )
+    if isinstance(value, (list, tuple)):
+        return any(_needs_fallback(item) for item in value)
+    if (
+        dataclasses is not None
+        and dataclasses.is_dataclass(value)
+        and not isinstance(value, type)
+    ):
+        return _needs_fallback(dataclasses.asdict(value))
+    return False
+
+
+def _make_orjson_dumps(orjson) -> Callable[[Any], bytes]:
+    def dumps(value: Any) -> bytes:
+        try:
+            return orjson.dumps(
+                value, default=default, option=orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            # E.g. integers larger than 64 bits.
+            return _fallback_dumps(value)
+
+    return dumps
+
+
+def _make_ujson_dumps(ujson) -> Callable[[Any], bytes]:
+    def dumps(value: Any) -> bytes:
+        try:
+            if _needs_fallback(value):
+                return _fallback_dumps(value)
+            return ujson.dumps(
+                value, ensure_ascii=False, default=default
+            ).encode()
+        except (TypeError, OverflowError, RecursionError, ValueError):
+            # E.g. circular references, which the standard library reports.
+            return _fallback_dumps(value)
+
+    return dumps
+
+
+def _make_rapidjson_dumps(rapidjson) -> Callable[[Any], bytes]:
+    def dumps(value: Any) -> bytes:
+        try:
+            if _needs_fallback(value):
+                return _fallback_dumps(value)
+            return rapidjson.dumps(
+                value, ensure_ascii=False, default=default
+            ).encode()
+        except (TypeError, OverflowError, RecursionError, ValueError):
+            # E.g. circular references, which the standard library reports.
+            return _fallback_dumps(value)
+
+    return dumps
+
+
+def _make_json_dumps(json_module) -> Callable[[Any], bytes]:
+    def dumps(value: Any) -> bytes:
+        return json_module.dumps(
+            value, default=default, ensure_ascii=False, separators=(',', ':')
+        ).encode()
+
+    return dumps
+
+
+_DUMPS_FACTORIES: Dict[str, Callable] = {
+    'orjson': _make_orjson_dumps,
+    'ujson': _make_ujson_dumps,
+    'rapidjson': _make_rapidjson_dumps,
+    'json': _make_json_dumps,
+}
+
+
+def get_backend(name: Optional[str] = None) -> JSONBackend:
+    """Return a JSON backend.
+
+    # Parameters
+    name (str):
+        One of `'orjson'`, `'ujson'`, `'rapidjson'` or `'json'`.
+        If not given, the first installed library is used
+        (see `PREFERRED_BACKENDS`).
+
+    # Raises
+    ValueError: if the requested JSON library is not supported.
+    ImportError: if the requested JSON library is not installed.
+    """
+    if name is not None:
+        if name not in _DUMPS_FACTORIES:
+            raise ValueError(
+                f'Unsupported JSON backend: {name} '
+                f'(available: {", ".join(PREFERRED_BACKENDS)})'
+            )
+        module = importlib.import_module(name)
+        return JSONBackend(
+            name=name, dumps=_DUMPS_FACTORIES[name](module), loads=module.loads
+        )
+
+    for name in PREFERRED_BACKENDS:
+        try:
+            return get_backend(name)
+        except ImportError:
+            continue
+
+    # The standard library is always available.
+    return JSONBackend(
+        name='json', dumps=_make_json_dumps(json), loads=json.loads
+    )
+
+
+# The backend used by default, picked once on import.
+backend = get_backend()
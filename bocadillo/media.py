@@ -1,36 +1,415 @@
-import json
-from typing import Any, Optional, Callable, Dict
+import copy
+import csv
+import io
+from collections.abc import Iterator, Mapping
+from urllib.parse import parse_qsl
+from typing import (
+    Any,
+    AnyStr,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
 
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import QueryParams
+
+from . import json_backends
+from .cache import LRUCache
 from .exceptions import UnsupportedMediaType
 
-MediaHandler = Callable[[Any], str]
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# NOTE: media handlers may return an iterable of chunks of bytes
+# (see `StreamingHandler`), which is then sent as a streamed response.
+MediaHandler = Callable[[Any], Union[AnyStr, Iterable[bytes]]]
+MediaDecoder = Callable[[bytes], Any]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Number of distinct `Accept` headers whose negotiated media type is cached.
+ACCEPT_CACHE_SIZE = 128
+
+# Estimated size (in bytes) above which values are serialized in the
+# thread pool, unless the handler has an `offload_threshold` attribute.
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+
+
+class OffloadStats(NamedTuple):
+    """Statistics about where values were serialized.
+
+    # Attributes
+    inline (int): the number of values serialized on the event loop.
+    offloaded (int): the number of values serialized in the thread pool.
+    """
+
+    inline: int
+    offloaded: int
+
+
+# Common types which are known not to be streams, checked before the
+# (slower) `Iterator` ABC.
+_NOT_STREAMS = frozenset(
+    (dict, list, tuple, str, bytes, int, float, bool, type(None))
+)
+
+
+def is_stream(value: Any) -> bool:
+    """Return whether a value is an iterator or an async iterable.
+
+    Such values are consumed lazily by streaming handlers. Containers such as
+    lists or dicts are not considered as streams.
+    """
+    if type(value) in _NOT_STREAMS:
+        return False
+    return isinstance(value, Iterator) or hasattr(value, '__aiter__')
+
 
+def estimate_size(value: Any) -> int:
+    """Cheaply estimate the serialized size of a value, in bytes.
 
-def handle_json(value: dict) -> str:
-    return json.dumps(value)
+    Only the first item of each container is inspected, and its estimated size
+    is multiplied by the container's length. As a result, the cost of the
+    estimation depends on the nesting depth of the value, not on its size.
+    """
+    cls = type(value)
+    if cls is str or cls is bytes:
+        return len(value)
+    if cls is dict or isinstance(value, Mapping):
+        if not value:
+            return 2
+        key = next(iter(value))
+        return len(value) * (estimate_size(key) + estimate_size(value[key]) + 4)
+    if cls is list or cls is tuple or isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        return len(value) * (estimate_size(value[0]) + 1)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
 
 
 def handle_text(value: Any) -> str:
     return str(value)
 
 
+# Converting values to strings is cheap: never offload.
+handle_text.offload_threshold = None
+
+
+def handle_msgpack(value: Any) -> bytes:
+    return msgpack.packb(
+        value, use_bin_type=True, default=json_backends.default
+    )
+
+
+class StreamingHandler:
+    """Base class for media handlers which encode a stream of items.
+
+    The items of a (sync or async) iterable are encoded one by one,
+    and batched into chunks of bytes.
+
+    Subclasses must implement `.encode_item()`, and may define a `prefix`,
+    a `separator` and a `suffix`.
+
+    Handlers with `streams_only = True` (the default) can only encode streams,
+    so they are not picked by content negotiation for other values.
+
+    Streams are encoded lazily, so they are never serialized in the
+    thread pool as a whole (see #Media.serialize_async()).
+
+    # Parameters
+    chunk_size (int):
+        The minimum size of chunks (in bytes), except for the last one.
+        Small items are buffered until this size is reached.
+        Defaults to 64 KiB.
+    """
+
+    prefix = b''
+    separator = b''
+    suffix = b''
+    streams_only = True
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def encode_item(self, item: Any, index: int) -> bytes:
+        raise NotImplementedError
+
+    def _encode(self, item: Any, index: int) -> bytes:
+        encoded = self.encode_item(item, index)
+        if index and self.separator:
+            return self.separator + encoded
+        return encoded
+
+    def _chunks(self, items: Iterable) -> Iterable[bytes]:
+        buffer = bytearray(self.prefix)
+        for index, item in enumerate(items):
+            buffer += self._encode(item, index)
+            if len(buffer) >= self.chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += self.suffix
+        if buffer:
+            yield bytes(buffer)
+
+    async def _achunks(self, items: AsyncIterable) -> AsyncIterator[bytes]:
+        buffer = bytearray(self.prefix)
+        index = 0
+        async for item in items:
+            buffer += self._encode(item, index)
+            index += 1
+            if len(buffer) >= self.chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += self.suffix
+        if buffer:
+            yield bytes(buffer)
+
+    def __call__(self, value: Union[Iterable, AsyncIterable]):
+        if hasattr(value, '__aiter__'):
+            return self._achunks(value)
+        return self._chunks(value)
+
+
+class _JSONStreamingHandler(StreamingHandler):
+    """Base class for streaming handlers which encode items as JSON.
+
+    # Parameters
+    chunk_size (int): see #StreamingHandler.
+    backend (str):
+        The name of the JSON library to use.
+        Defaults to the fastest one installed.
+        See also #~some.json_backends.get_backend().
+    """
+
+    def __init__(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE, backend: str = None
+    ):
+        super().__init__(chunk_size=chunk_size)
+        if backend is None:
+            self.backend = json_backends.backend
+        else:
+            self.backend = json_backends.get_backend(backend)
+        self.dumps = self.backend.dumps
+
+
+class JSONHandler(_JSONStreamingHandler):
+    """Encode values as JSON.
+
+    Iterators and async iterables are streamed as a JSON array.
+    Other values are encoded in one go.
+    """
+
+    prefix = b'['
+    separator = b','
+    suffix = b']'
+    streams_only = False
+
+    def encode_item(self, item: Any, index: int) -> bytes:
+        return self.dumps(item)
+
+    def __call__(self, value: Any):
+        if is_stream(value):
+            return super().__call__(value)
+        return self.dumps(value)
+
+
+class NDJSONHandler(_JSONStreamingHandler):
+    """Encode items as newline-delimited JSON."""
+
+    def encode_item(self, item: Any, index: int) -> bytes:
+        return self.dumps(item) + b'\n'
+
+
+class CSVHandler(StreamingHandler):
+    """Encode rows as CSV.
+
+    Rows are sequences of values, or mappings. In the latter case,
+    the keys of the first row are used as the header, and values of
+    the following rows are written under the column of their key.
+
+    # Parameters
+    chunk_size (int): see #StreamingHandler.
+    restval (str):
+        The value written for keys which are missing from a row.
+        Defaults to `''`.
+    extrasaction (str):
+        What to do with keys which are not in the header: `'ignore'`
+        (the default) drops them, `'raise'` raises a `ValueError`.
+        See also `csv.DictWriter`.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        restval: str = '',
+        extrasaction: str = 'ignore',
+    ):
+        super().__init__(chunk_size=chunk_size)
+        self.restval = restval
+        self.extrasaction = extrasaction
+        self._fieldnames: Optional[List] = None
+
+    def __call__(self, value: Union[Iterable, AsyncIterable]):
+        # The header is specific to each stream, so each stream is encoded
+        # by its own copy of the handler.
+        handler = copy.copy(self)
+        handler._fieldnames = None
+        return super(CSVHandler, handler).__call__(value)
+
+    def encode_item(self, item: Any, index: int) -> bytes:
+        output = io.StringIO()
+        if isinstance(item, Mapping):
+            if index == 0:
+                self._fieldnames = list(item.keys())
+            if self._fieldnames is None:
+                raise ValueError('Cannot write a mapping after a sequence row')
+            writer = csv.DictWriter(
+                output,
+                fieldnames=self._fieldnames,
+                restval=self.restval,
+                extrasaction=self.extrasaction,
+            )
+            if index == 0:
+                writer.writeheader()
+            writer.writerow(item)
+        else:
+            csv.writer(output).writerow(item)
+        return output.getvalue().encode()
+
+
+def decode_json(body: bytes) -> Any:
+    return json_backends.backend.loads(body)
+
+
+def decode_form(body: bytes) -> QueryParams:
+    return QueryParams(
+        items=parse_qsl(body.decode('utf-8'), keep_blank_values=True)
+    )
+
+
+def decode_msgpack(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+def get_default_decoders() -> dict:
+    decoders = {Media.JSON: decode_json, Media.FORM: decode_form}
+    if msgpack is not None:
+        decoders[Media.MSGPACK] = decode_msgpack
+    return decoders
+
+
 def get_default_handlers() -> dict:
     return {
-        Media.JSON: handle_json,
+        Media.JSON: JSONHandler(),
         Media.PLAIN_TEXT: handle_text,
         Media.HTML: handle_text,
+        Media.NDJSON: NDJSONHandler(),
+        Media.CSV: CSVHandler(),
+        **({Media.MSGPACK: handle_msgpack} if msgpack is not None else {}),
     }
 
 
+def parse_accept(accept: str) -> List[str]:
+    """Parse an `Accept` header into a list of media ranges.
+
+    Media ranges are sorted by decreasing quality, then from the most specific
+    (e.g. `text/html`) to the least specific (`*/*`). Ranges with
+    a quality of zero are dropped.
+    """
+    ranges = []
+    for index, item in enumerate(accept.split(',')):
+        media_range, *params = item.split(';')
+        media_range = media_range.strip().lower()
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        specificity = media_range.count('*')
+        ranges.append((-quality, specificity, index, media_range))
+    return [media_range for *_, media_range in sorted(ranges)]
+
+
+class _Handlers(dict):
+    """Dictionary of media handlers which notifies its media registry
+    when it is modified."""
+
+    def __init__(self, media: 'Media', handlers: dict):
+        super().__init__(handlers)
+        self._media = media
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._media._invalidate()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._media._invalidate()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._media._invalidate()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._media._invalidate()
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._media._invalidate()
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._media._invalidate()
+
+    def clear(self):
+        super().clear()
+        self._media._invalidate()
+
+
 class Media:
     """Registry of media handlers."""
 
     JSON = 'application/json'
     PLAIN_TEXT = 'text/plain'
     HTML = 'text/html'
+    NDJSON = 'application/x-ndjson'
+    CSV = 'text/csv'
+    FORM = 'application/x-www-form-urlencoded'
+    MSGPACK = 'application/x-msgpack'
 
-    def __init__(self, media_type: str,
-                 handlers: Dict[str, MediaHandler] = None):
+    # Media types which are never picked by content negotiation
+    # (unless they are the default media type), because their handlers
+    # only convert values to strings.
+    NOT_NEGOTIABLE = (PLAIN_TEXT, HTML)
+
+    def __init__(
+        self,
+        media_type: str,
+        handlers: Dict[str, MediaHandler] = None,
+        decoders: Dict[str, MediaDecoder] = None,
+    ):
         """Create a media registry.
 
         Parameters
@@ -40,12 +419,95 @@ class Media:
         handlers : dict of str -> MediaHandler, optional
             A mapping of media type to an (Any) -> str callable.
             Defaults to built-in media handlers.
+        decoders : dict of str -> MediaDecoder, optional
+            A mapping of media type to a (bytes) -> Any callable, used
+            to parse request bodies.
+            Defaults to built-in media decoders.
         """
         if handlers is None:
             handlers = get_default_handlers()
+        if decoders is None:
+            decoders = get_default_decoders()
+        self._negotiated = LRUCache(maxsize=ACCEPT_CACHE_SIZE)
+        self._inline = 0
+        self._offloaded = 0
+        # Whether the value is a stream -> (media range -> media type).
+        self._tables: Dict[bool, Dict[str, str]] = {}
         self.handlers = handlers
+        self.decoders = decoders
         self.type = media_type
 
+    @property
+    def handlers(self) -> Dict[str, MediaHandler]:
+        return self._handlers
+
+    @handlers.setter
+    def handlers(self, handlers: Dict[str, MediaHandler]):
+        self._handlers = _Handlers(self, handlers)
+        self._invalidate()
+
+    def _invalidate(self):
+        self._tables.clear()
+        self._negotiated.clear()
+
+    def _build_table(self, stream: bool) -> Dict[str, str]:
+        # Media range -> media type. The default media type comes first so
+        # that it is preferred for wildcards.
+        table = {'*/*': self.type}
+        candidates = [self.type, *self.handlers]
+        for media_type in candidates:
+            if media_type != self.type:
+                if media_type in self.NOT_NEGOTIABLE:
+                    continue
+                handler = self.handlers[media_type]
+                if not stream and getattr(handler, 'streams_only', False):
+                    continue
+            table.setdefault(media_type, media_type)
+            table.setdefault(media_type.split('/', 1)[0] + '/*', media_type)
+        return table
+
+    def negotiate(self, accept: Optional[str], stream: bool = False) -> str:
+        """Return the media type which best matches an `Accept` header.
+
+        Results are cached per `Accept` header.
+        If no media type is acceptable, the default media type is returned.
+
+        Parameters
+        ----------
+        accept : str, optional
+            The value of an `Accept` header.
+        stream : bool, optional
+            Whether the value to serialize is a stream (see `is_stream()`).
+            If not, handlers which only encode streams are not considered.
+            Defaults to `False`.
+        """
+        if not accept:
+            return self.type
+        key = (accept, stream)
+        media_type = self._negotiated.get(key)
+        if media_type is None:
+            table = self._tables.get(stream)
+            if table is None:
+                table = self._tables[stream] = self._build_table(stream)
+            media_type = self.type
+            for media_range in parse_accept(accept):
+                if media_range in table:
+                    media_type = table[media_range]
+                    break
+            self._negotiated.set(key, media_type)
+        return media_type
+
+    def offload_stats(self) -> OffloadStats:
+        """Return statistics about serialization offloading.
+
+        See also #Media.serialize_async().
+        """
+        return OffloadStats(inline=self._inline, offloaded=self._offloaded)
+
+    def negotiation_cache_info(self):
+        """Return statistics about the cache of negotiated media types."""
+        return self._negotiated.info()
+
     def serialize(self, value: Any, media_type: Optional[str] = None):
         """Serialize a value using the given media type.
 
@@ -56,12 +518,78 @@ class Media:
             The media type of the given value. Determines which media handler
             is used.
             Defaults to the media registry's media type.
+
+        Returns
+        -------
+        serialized : str, bytes or iterable of bytes
+            An iterable of chunks is returned by streaming handlers.
         """
         if media_type is None:
             media_type = self.type
         handler = self.handlers[media_type]
         return handler(value)
 
+    async def serialize_async(
+        self, value: Any, media_type: Optional[str] = None
+    ):
+        """Serialize a value without blocking the event loop for too long.
+
+        If the estimated serialized size of the value is larger than the
+        handler's `offload_threshold` attribute (or 256 KiB if the handler
+        has none), the value is serialized in the thread pool.
+        Set `offload_threshold` to `None` to never offload, or to `0` to
+        always offload.
+
+        Parameters
+        ----------
+        value : any
+        media_type : str, optional
+            See `.serialize()`.
+        """
+        if media_type is None:
+            media_type = self.type
+        handler = self.handlers[media_type]
+        threshold = getattr(
+            handler, 'offload_threshold', DEFAULT_OFFLOAD_THRESHOLD
+        )
+        if (
+            threshold is not None
+            and not is_stream(value)
+            and estimate_size(value) >= threshold
+        ):
+            self._offloaded += 1
+            return await run_in_threadpool(handler, value)
+        self._inline += 1
+        return handler(value)
+
+    def deserialize(self, body: bytes, media_type: Optional[str] = None):
+        """Parse a body using the given media type.
+
+        Parameters
+        ----------
+        body : bytes
+        media_type : str, optional
+            The media type of the body, e.g. the value of the `Content-Type`
+            header. Parameters such as `charset` are ignored.
+            Defaults to the media registry's media type.
+
+        Raises
+        ------
+        UnsupportedMediaType :
+            If no decoder exists for the given media type.
+        """
+        if media_type is None:
+            media_type = self.type
+        else:
+            media_type = media_type.split(';', 1)[0].strip().lower()
+        try:
+            decoder = self.decoders[media_type]
+        except KeyError:
+            raise UnsupportedMediaType(
+                media_type, available=list(self.decoders)
+            ) from None
+        return decoder(body)
+
     @property
     def type(self) -> str:
         """Return the default media type."""
@@ -84,3 +612,4 @@ class Media:
             raise UnsupportedMediaType(media_type,
                                        available=list(self.handlers))
         self._default_type = media_type
+        self._invalidate()
@@ -10,8 +10,9 @@ routing occurs.
 Common middleware should be called first, then routing middleware, which should
 end up calling the actual Bocadillo API object.
 """
-from typing import Callable, List
+from typing import Callable, Tuple
 
+from .compat import make_async
 from .request import Request
 
 
@@ -36,7 +37,22 @@ class CommonMiddleware(Middleware):
 
 
 class RoutingMiddleware(Middleware):
-    """Helper for middleware that act before and after routing."""
+    """Helper for middleware that act before and after routing.
+
+    The outermost routing middleware collects the callbacks of the whole
+    stack each time a middleware is added, so that the API receives them
+    as ready-made sequences of coroutine functions.
+
+    Middleware which override `.dispatch()` are still called: callbacks
+    are collected up to such a middleware, whose `.dispatch()` receives them
+    as `before` and `after` tuples.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._before: Tuple[Callable, ...] = ()
+        self._after: Tuple[Callable, ...] = ()
+        self._compile()
 
     def before_dispatch(self, req):
         pass
@@ -44,32 +60,70 @@ class RoutingMiddleware(Middleware):
     def after_dispatch(self, req, res):
         pass
 
+    def add(self, middleware_cls, **kwargs):
+        super().add(middleware_cls, **kwargs)
+        self._compile()
+
+    def _compile(self):
+        """Collect callbacks from the stack of routing middleware.
+
+        Callbacks which were not overridden are no-ops, so they are dropped.
+        Collection stops at the API or at the next middleware which
+        overrides `.dispatch()`.
+        """
+        before = []
+        after = []
+        app = self
+        while True:
+            cls = type(app)
+            if cls.before_dispatch is not RoutingMiddleware.before_dispatch:
+                before.append(make_async(app.before_dispatch))
+            if cls.after_dispatch is not RoutingMiddleware.after_dispatch:
+                after.append(make_async(app.after_dispatch))
+            app = app.app
+            if (
+                not isinstance(app, RoutingMiddleware)
+                or type(app).dispatch is not RoutingMiddleware.dispatch
+            ):
+                break
+        self._before = tuple(before)
+        self._after = tuple(after)
+        self._next = app
+        while isinstance(app, RoutingMiddleware):
+            app = app.app
+        self._api = app
+
     async def dispatch(
-        self, request,
-        before: List[Callable] = None,
-        after: List[Callable] = None,
+        self,
+        request,
+        before: Tuple[Callable, ...] = (),
+        after: Tuple[Callable, ...] = (),
     ):
-        if before:
-            before.append(self.before_dispatch)
-        else:
-            before = [self.before_dispatch]
-
-        if after:
-            after.append(self.after_dispatch)
+        """Dispatch a request to the next middleware or to the API.
+
+        # Parameters
+        request (Request): an inbound HTTP request.
+        before (tuple of coroutine functions):
+            `before_dispatch` callbacks of outer middleware.
+        after (tuple of coroutine functions):
+            `after_dispatch` callbacks of outer middleware.
+        """
+        if before or after:
+            before = before + self._before
+            after = after + self._after
         else:
-            after = [self.after_dispatch]
-
-        response = await self.app.dispatch(
-            request,
-            before=before,
-            after=after,
-        )
-        return response
+            before, after = self._before, self._after
+        return await self._next.dispatch(request, before=before, after=after)
 
     def __call__(self, scope: dict):
         async def asgi(receive, send):
             nonlocal scope
-            request = Request(scope, receive)
+            request = Request(
+                scope,
+                receive,
+                media=self._api._media,
+                max_body_size=self._api.max_body_size,
+            )
             response = await self.dispatch(request)
             await response(receive, send)
 
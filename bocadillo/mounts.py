@@ -0,0 +1,66 @@
+"""Index of mounted apps, used to find the app a path should be handed to.
+
+Mount prefixes are stored in a trie of path segments, so that:
+
+- The longest matching prefix wins, regardless of mount order.
+- Prefixes only match at segment boundaries, e.g. `/static` matches
+`/static/app.js` but not `/staticfiles/app.js`.
+"""
+from typing import Dict, Optional, Tuple
+
+from .patterns import split_path
+from .types import ASGIApp
+
+
+class _Node:
+    """A node of the mount trie."""
+
+    __slots__ = ('children', 'prefix', 'app')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.prefix: Optional[str] = None
+        self.app: Optional[ASGIApp] = None
+
+
+class MountIndex:
+    """Registry of ASGI apps indexed by path prefix."""
+
+    def __init__(self):
+        self._root = _Node()
+
+    def add(self, prefix: str, app: ASGIApp):
+        """Register an app at the given prefix.
+
+        The prefix must start with a `/`. Trailing slashes are ignored.
+        If an app was already mounted at the same prefix, it is replaced.
+        """
+        prefix = prefix.rstrip('/')
+        node = self._root
+        if prefix:
+            for segment in split_path(prefix):
+                node = node.children.setdefault(segment, _Node())
+        node.prefix = prefix
+        node.app = app
+
+    def match(self, path: str) -> Optional[Tuple[str, ASGIApp]]:
+        """Find the app mounted at the longest prefix of a path.
+
+        # Returns
+        prefix_and_app (tuple):
+            The matching prefix and the app mounted there,
+            or `None` if no app matches.
+        """
+        node = self._root
+        found = node if node.app is not None else None
+
+        for segment in split_path(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.app is not None:
+                found = node
+
+        if found is None:
+            return None
+        return found.prefix, found.app
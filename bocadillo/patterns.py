@@ -0,0 +1,209 @@
+"""Compilation of route patterns.
+
+Route patterns use the format string syntax, e.g. `'/add/{x:int}/{y:int}'`.
+They are compiled once, when a route is declared, into:
+
+- A matcher for the whole pattern.
+- A list of path segments (literal strings or matchers) used by the router.
+- An optional tail matcher, used when a route parameter may span
+across multiple path segments (e.g. `{filepath:path}`).
+"""
+import re
+from string import Formatter
+from typing import Dict, List, Optional, Tuple, Union
+
+from .converters import Converter, DEFAULT_CONVERTER
+from .exceptions import RouteDeclarationError
+
+
+def split_path(path: str) -> List[str]:
+    """Split a path into segments.
+
+    The trailing slash is significant: `'/foo/'` gives `['foo', '']`
+    while `'/foo'` gives `['foo']`.
+    """
+    return path[1:].split('/')
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+class Matcher:
+    """Match strings against a compiled pattern and convert parameters.
+
+    # Attributes
+    source (str): the pattern.
+    shape (str):
+        The pattern without parameter names, e.g. `'{:int}'` for
+        `'{pk:int}'`. Matchers of the same shape match the same strings.
+    names (tuple of str): the names of parameters, in order.
+    typed (bool): whether parameters use converters other than the default.
+    """
+
+    __slots__ = ('source', 'shape', 'names', 'typed', '_regex', '_converters')
+
+    def __init__(
+        self,
+        source: str,
+        shape: str,
+        regex: str,
+        converters: Dict[str, Converter],
+        typed: bool,
+    ):
+        self.source = source
+        self.shape = shape
+        self.names = tuple(converters)
+        self.typed = typed
+        self._regex = re.compile(regex)
+        self._converters = tuple(
+            (index, converter.convert)
+            for index, converter in enumerate(converters.values())
+            if converter.convert is not str
+        )
+
+    def match_values(self, value: str) -> Optional[list]:
+        """Return converted parameters in order, or `None` if `value`
+        does not match."""
+        match = self._regex.fullmatch(value)
+        if match is None:
+            return None
+        values = [match.group(name) for name in self.names]
+        try:
+            for index, convert in self._converters:
+                values[index] = convert(values[index])
+        except ValueError:
+            return None
+        return values
+
+    def match(self, value: str) -> Optional[dict]:
+        """Return converted parameters, or `None` if `value` does not match."""
+        values = self.match_values(value)
+        if values is None:
+            return None
+        return dict(zip(self.names, values))
+
+
+Segment = Union[str, Matcher]
+
+
+class CompiledPattern:
+    """A route pattern compiled against a registry of converters.
+
+    # Attributes
+    source (str): the original pattern.
+    matcher (Matcher): a matcher for the whole pattern.
+    segments (list):
+        Path segments, either literal strings or matchers.
+    names (tuple of str):
+        The names of parameters of matcher segments, in order.
+    tail (Matcher):
+        A matcher for the remaining path segments when a route parameter
+        spans across segments. Otherwise, `None`.
+    """
+
+    __slots__ = ('source', 'matcher', 'segments', 'names', 'tail', '_format')
+
+    def __init__(self, source: str, converters: Dict[str, Converter]):
+        self.source = source
+
+        regex, params, self._format, shape = _compile(source, converters)
+        self.matcher = Matcher(source, shape, regex, params, typed=bool(params))
+
+        self.segments: List[Segment] = []
+        self.tail: Optional[Matcher] = None
+        names = []
+
+        parts = split_path(source)
+        for index, part in enumerate(parts):
+            regex, params, _, shape = _compile(part, converters)
+
+            if any(converter.spans_segments for converter in params.values()):
+                tail = '/'.join(parts[index:])
+                regex, params, _, shape = _compile(tail, converters)
+                self.tail = Matcher(tail, shape, regex, params, typed=True)
+                break
+
+            if not params:
+                # Literal segment. NOTE: the formatter unescapes doubled
+                # braces, so use the literal text it yields.
+                self.segments.append(_literal(part))
+                continue
+
+            default = converters.get(DEFAULT_CONVERTER)
+            typed = any(
+                converter is not default for converter in params.values()
+            )
+            self.segments.append(
+                Matcher(part, shape, regex, params, typed=typed)
+            )
+            names.extend(params)
+
+        self.names = tuple(names)
+
+    def format(self, **kwargs) -> str:
+        """Build a path from the given route parameters."""
+        return self._format.format(**kwargs)
+
+
+def _literal(text: str) -> str:
+    return ''.join(literal for literal, _, _, _ in Formatter().parse(text))
+
+
+def _compile(
+    pattern: str, converters: Dict[str, Converter]
+) -> Tuple[str, Dict[str, Converter], str, str]:
+    """Compile a pattern into a regex, its parameters, a format string
+    and its shape (see #Matcher)."""
+    regex = []
+    fmt = []
+    shape = []
+    params: Dict[str, Converter] = {}
+
+    for literal, name, spec, conversion in Formatter().parse(pattern):
+        regex.append(re.escape(literal))
+        fmt.append(_escape_braces(literal))
+        shape.append(_escape_braces(literal))
+
+        if name is None:
+            continue
+
+        if not name:
+            raise RouteDeclarationError(
+                f'Route pattern "{pattern}" contains an unnamed parameter.'
+            )
+
+        if not name.isidentifier():
+            raise RouteDeclarationError(
+                f'Parameter "{name}" of route pattern "{pattern}" is not '
+                'a valid identifier.'
+            )
+
+        if name in params:
+            raise RouteDeclarationError(
+                f'Parameter "{name}" of route pattern "{pattern}" '
+                'is declared more than once.'
+            )
+
+        if conversion is not None:
+            raise RouteDeclarationError(
+                f'Parameter "{name}" of route pattern "{pattern}" uses '
+                f'conversion "!{conversion}", which is not supported.'
+            )
+
+        spec = spec or DEFAULT_CONVERTER
+        try:
+            converter = converters[spec]
+        except KeyError:
+            raise RouteDeclarationError(
+                f'Parameter "{name}" of route pattern "{pattern}" uses '
+                f'unknown converter "{spec}" (available: '
+                f'{", ".join(converters)}).'
+            ) from None
+
+        params[name] = converter
+        regex.append(f'(?P<{name}>{converter.regex})')
+        fmt.append(f'{{{name}}}')
+        shape.append(f'{{:{spec}}}')
+
+    return ''.join(regex), params, ''.join(fmt), ''.join(shape)
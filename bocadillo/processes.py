@@ -0,0 +1,191 @@
+"""Offloading of CPU-bound views and hooks to worker processes.
+
+Threads cannot run CPU-bound Python code in parallel because of the GIL,
+but processes can. However, requests and responses cannot be sent to
+another process as is. Instead:
+
+- The request is sent as a picklable #RequestSnapshot (including its body).
+- The view or hook receives a #ResponseRecorder, which records attribute
+assignments (e.g. `res.media = ...`) and is sent back to the main process.
+- The recorded changes are then applied to the actual response.
+
+Process-bound views and hooks must be defined at the top level of a module
+(class-based views included), so that worker processes can import them.
+"""
+import importlib
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from .executors import ProcessExecutor
+
+# Attribute set on functions marked with `process_bound()`.
+PROCESS_BOUND_ATTRIBUTE = '__process_bound__'
+
+
+def process_bound(func: Callable) -> Callable:
+    """Mark a view or hook function as process-bound.
+
+    It will then be run in the API's `'process'` executor (see #API.executors),
+    unless the view's route uses another process executor.
+
+    # Example
+    ```python
+    >>> from bocadillo.processes import process_bound
+    >>> @process_bound
+    ... def make_thumbnail(req, res, params):
+    ...     pass
+    ```
+    """
+    setattr(func, PROCESS_BOUND_ATTRIBUTE, True)
+    return func
+
+
+def is_process_bound(func: Callable) -> bool:
+    return getattr(func, PROCESS_BOUND_ATTRIBUTE, False)
+
+
+class RequestSnapshot(NamedTuple):
+    """A picklable, read-only copy of a request.
+
+    Unlike on a regular request, `body` is a `bytes` attribute
+    (not a coroutine).
+    """
+
+    method: str
+    url: str
+    path: str
+    headers: Dict[str, str]
+    query_params: Dict[str, str]
+    body: bytes
+
+    @classmethod
+    async def from_request(cls, request) -> 'RequestSnapshot':
+        return cls(
+            method=request.method,
+            url=str(request.url),
+            path=request.url.path,
+            headers=dict(request.headers),
+            query_params=dict(request.query_params),
+            body=await request.body(),
+        )
+
+
+class ResponseRecorder:
+    """A picklable stand-in for a response in worker processes.
+
+    It records assignments to `.text`, `.html`, `.media` and `.content`,
+    as well as changes to `.status_code` and `.headers`.
+
+    # Raises
+    TypeError: when assigning any other attribute, e.g. `.stream`
+    (streams can't be sent back from worker processes).
+    """
+
+    _RECORDED = ('text', 'html', 'media', 'content')
+    _ATTRIBUTES = ('status_code', 'headers', 'changes')
+
+    def __init__(self, status_code: int = None, headers: dict = None):
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.changes: List[Tuple[str, Any]] = []
+
+    @classmethod
+    def from_response(cls, response) -> 'ResponseRecorder':
+        return cls(status_code=response.status_code, headers=response.headers)
+
+    def __setattr__(self, key: str, value: Any):
+        if key in self._RECORDED:
+            self.changes.append((key, value))
+        elif key in self._ATTRIBUTES:
+            super().__setattr__(key, value)
+        elif key == 'stream':
+            raise TypeError(
+                "streams can't be returned from process-bound views"
+            )
+        else:
+            raise TypeError(
+                f"'{key}' can't be set on responses of process-bound views"
+            )
+
+    def apply(self, response):
+        """Apply recorded changes to an actual response."""
+        response.status_code = self.status_code
+        response.headers.clear()
+        response.headers.update(self.headers)
+        for key, value in self.changes:
+            setattr(response, key, value)
+
+
+class FunctionReference(NamedTuple):
+    """A picklable reference to a module-level function or method.
+
+    Functions decorated with `@api.route()` can't be pickled as is, because
+    their name refers to a #~some.route.Route in their module. References are
+    resolved by looking them up by name and unwrapping routes along the way.
+    """
+
+    module: str
+    qualname: str
+
+    @classmethod
+    def create(cls, func: Callable) -> 'FunctionReference':
+        return cls(module=func.__module__, qualname=func.__qualname__)
+
+    def resolve(self) -> Callable:
+        from .route import Route
+
+        obj = importlib.import_module(self.module)
+        for name in self.qualname.split('.'):
+            obj = getattr(obj, name)
+            if isinstance(obj, Route):
+                obj = obj.view
+        return obj
+
+
+def _run_view(
+    ref: FunctionReference, req, res, kwargs: dict
+) -> ResponseRecorder:
+    ref.resolve()(req, res, **kwargs)
+    return res
+
+
+def _run_hook(
+    ref: FunctionReference, req, res, params: dict, args: tuple, kwargs: dict
+) -> ResponseRecorder:
+    ref.resolve()(req, res, params, *args, **kwargs)
+    return res
+
+
+async def run_view(
+    executor: ProcessExecutor, view: Callable, req, res, **kwargs
+):
+    """Run a view in a worker process and apply changes to `res`."""
+    snapshot = await RequestSnapshot.from_request(req)
+    recorder = ResponseRecorder.from_response(res)
+    recorder = await executor.run(
+        _run_view, FunctionReference.create(view), snapshot, recorder, kwargs
+    )
+    recorder.apply(res)
+
+
+async def run_hook(
+    executor: ProcessExecutor,
+    hook: Callable,
+    req,
+    res,
+    params: dict,
+    *args,
+    **kwargs
+):
+    """Run a hook in a worker process and apply changes to `res`."""
+    snapshot = await RequestSnapshot.from_request(req)
+    recorder = ResponseRecorder.from_response(res)
+    recorder = await executor.run(
+        _run_hook,
+        FunctionReference.create(hook),
+        snapshot,
+        recorder,
+        params,
+        args,
+        kwargs,
+    )
+    recorder.apply(res)
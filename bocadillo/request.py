@@ -1,4 +1,86 @@
+from http import HTTPStatus
+from typing import Any, AsyncGenerator
+
 from starlette.requests import Request as _Request
 
-# Alias (for now)
-Request = _Request
+from .exceptions import HTTPError, UnsupportedMediaType
+from .media import Media
+
+
+class Request(_Request):
+    """Request object, based on the [Starlette Request].
+
+    [Starlette Request]: https://www.starlette.io/requests/
+
+    # Parameters
+    scope (dict): an ASGI scope.
+    receive (coroutine function): an ASGI receive channel.
+    media (Media):
+        The media registry used by `.media()`.
+        Defaults to built-in media handlers and decoders.
+    max_body_size (int):
+        The maximum size of the request body, in bytes.
+        Defaults to `None` (no limit).
+    """
+
+    def __init__(
+        self,
+        scope: dict,
+        receive=None,
+        media: Media = None,
+        max_body_size: int = None,
+    ):
+        super().__init__(scope, receive)
+        self._media_registry = media
+        self.max_body_size = max_body_size
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        """Iterate over chunks of the request body.
+
+        # Raises
+        HTTPError(413):
+            if the body is larger than `max_body_size`. This is detected
+            before the body is read when a `Content-Length` header is sent,
+            and as soon as the limit is exceeded otherwise.
+        """
+        max_body_size = self.max_body_size
+        if max_body_size is None or hasattr(self, '_body'):
+            async for chunk in super().stream():
+                yield chunk
+            return
+
+        content_length = self.headers.get('content-length', '')
+        if content_length.isdigit() and int(content_length) > max_body_size:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        received = 0
+        async for chunk in super().stream():
+            received += len(chunk)
+            if received > max_body_size:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            yield chunk
+
+    async def media(self) -> Any:
+        """Parse the request body according to its `Content-Type`.
+
+        The body is parsed only once: subsequent calls return the same value.
+        If no `Content-Type` is given, the default media type is assumed.
+
+        # Raises
+        HTTPError(415): if no decoder exists for the content type.
+        HTTPError(400): if the body cannot be decoded.
+        HTTPError(413): see `.stream()`.
+        """
+        if not hasattr(self, '_media_value'):
+            if self._media_registry is None:
+                self._media_registry = Media(media_type=Media.JSON)
+            body = await self.body()
+            try:
+                self._media_value = self._media_registry.deserialize(
+                    body, media_type=self.headers.get('content-type')
+                )
+            except UnsupportedMediaType:
+                raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE) from None
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+        return self._media_value
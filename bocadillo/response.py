@@ -1,49 +1,240 @@
-from typing import AnyStr, Any
+from functools import lru_cache
+from typing import Any, AnyStr, List, Optional, Tuple
 
 from starlette.requests import Request
-from starlette.responses import Response as _Response
 
-from bocadillo.media import Media
+from bocadillo.media import Media, is_stream
+from bocadillo.streaming import Stream, send_stream
+
+# Statuses whose responses must not declare a content length.
+_STATUSES_WITHOUT_CONTENT_LENGTH = {204, 304}
+
+# Pre-encoded values of the `content-type` header.
+_CONTENT_TYPES = {
+    media_type: media_type.encode('latin-1')
+    for media_type in (
+        Media.JSON,
+        Media.PLAIN_TEXT,
+        Media.HTML,
+        Media.NDJSON,
+        Media.CSV,
+    )
+}
+
+
+@lru_cache(maxsize=256)
+def _encode_header_name(name: str) -> bytes:
+    return name.lower().encode('latin-1')
+
+
+def _encode_header_value(value: str) -> bytes:
+    encoded = _CONTENT_TYPES.get(value)
+    if encoded is None:
+        encoded = value.encode('latin-1')
+    return encoded
+
+
+def _add_vary(headers: dict, name: str):
+    if not headers:
+        headers['vary'] = name
+        return
+    # Header names set by views may have any case, e.g. `Vary`.
+    key = next((key for key in headers if key.lower() == 'vary'), 'vary')
+    vary = headers.get(key)
+    if vary is None:
+        headers[key] = name
+    elif name.lower() not in (
+        field.strip().lower() for field in vary.split(',')
+    ):
+        headers[key] = f'{vary}, {name}'
+
+
+class _MediaSetter:
+    """Write-only attribute which sets values to be serialized into the
+    response content.
+
+    # Parameters
+    media_type (str):
+        The media type of assigned values.
+        If `None`, it is negotiated using the request's `Accept` header.
+    """
+
+    __slots__ = ('media_type',)
+
+    def __init__(self, media_type: Optional[str] = None):
+        self.media_type = media_type
+
+    def __get__(self, response, owner=None):
+        if response is None:
+            return self
+        raise AttributeError('media attributes of a response are write-only')
+
+    def __set__(self, response: 'Response', value: Any):
+        media_type = self.media_type
+        if media_type is None:
+            media_type = response._media.negotiate(
+                response.request.headers.get('accept'), stream=is_stream(value)
+            )
+            _add_vary(response.headers, 'Accept')
+        response._set_media(value, media_type)
+        response.headers['content-type'] = media_type
 
 
 class Response:
-    """Response builder."""
+    """Response builder.
+
+    # Attributes
+    status_code (int): the HTTP status code. Defaults to `200`.
+    headers (dict): response headers.
+    content (str or bytes): the raw response content.
+    stream (iterable or async iterable):
+        An iterable of `str` or `bytes` chunks to be sent one by one instead
+        of `content`, e.g. a generator or an async generator. Sync iterables
+        are iterated over in a thread pool.
+    text (any): write-only, sets the content as plain text.
+    html (any): write-only, sets the content as HTML.
+    media (any):
+        write-only, sets the content using the media type which best matches
+        the request's `Accept` header (or the default media type).
+
+    Values given to `text`, `html` and `media` are serialized lazily, i.e.
+    when `content` or `stream` is accessed, or when `.serialize_media()` is
+    awaited. The latter serializes large values in the thread pool.
+    """
+
+    __slots__ = (
+        'request',
+        'status_code',
+        'headers',
+        '_media',
+        '_content',
+        '_stream',
+        '_pending_media',
+    )
+
+    text = _MediaSetter(Media.PLAIN_TEXT)
+    html = _MediaSetter(Media.HTML)
+    media = _MediaSetter()
 
     def __init__(self, request: Request, media: Media):
         self.request = request
         self._content: AnyStr = None
+        self._stream: Stream = None
+        self._pending_media: Optional[Tuple[Any, str]] = None
         self.status_code: int = None
         self.headers = {}
         self._media = media
 
     def _set_media(self, value: Any, media_type: str):
-        content = self._media.serialize(value, media_type=media_type)
-        self.headers['content-type'] = media_type
-        self._content = content
+        self._pending_media = (value, media_type)
+        self._content = None
+        self._stream = None
 
-    def __setattr__(self, key, value):
-        if key == 'text':
-            self._set_media(value, media_type=Media.PLAIN_TEXT)
-        elif key == 'html':
-            self._set_media(value, media_type=Media.HTML)
-        elif key == 'media':
-            self._set_media(value, media_type=self._media.type)
-        elif key == 'content':
-            self._content = value
+    def _set_serialized(self, serialized):
+        if isinstance(serialized, (str, bytes)):
+            self.content = serialized
         else:
-            super().__setattr__(key, value)
+            self.stream = serialized
+
+    def _serialize_media_sync(self):
+        if self._pending_media is not None:
+            value, media_type = self._pending_media
+            # Discard the value even if it fails to serialize, so that
+            # error handlers don't have to replace it.
+            self._pending_media = None
+            self._set_serialized(
+                self._media.serialize(value, media_type=media_type)
+            )
+
+    async def serialize_media(self):
+        """Serialize the value given to `text`, `html` or `media` (if any).
+
+        Large values are serialized in the thread pool.
+        See also #~some.media.Media.serialize_async().
+
+        If serialization fails, the value is discarded.
+        """
+        if self._pending_media is not None:
+            value, media_type = self._pending_media
+            self._pending_media = None
+            self._set_serialized(
+                await self._media.serialize_async(value, media_type=media_type)
+            )
+
+    @property
+    def content(self) -> Optional[AnyStr]:
+        self._serialize_media_sync()
+        return self._content
+
+    @content.setter
+    def content(self, content: AnyStr):
+        self._content = content
+        self._stream = None
+        self._pending_media = None
+
+    @property
+    def stream(self) -> Optional[Stream]:
+        self._serialize_media_sync()
+        return self._stream
+
+    @stream.setter
+    def stream(self, stream: Stream):
+        self._stream = stream
+        self._content = None
+        self._pending_media = None
+
+    def _encode_body(self) -> bytes:
+        content = self._content
+        if content is None:
+            return b''
+        if isinstance(content, str):
+            return content.encode('utf-8')
+        return content
+
+    def _encode_headers(
+        self, status_code: int, body: Optional[bytes]
+    ) -> List[Tuple[bytes, bytes]]:
+        raw_headers = [
+            (_encode_header_name(name), _encode_header_value(value))
+            for name, value in self.headers.items()
+        ]
+        names = {name for name, _ in raw_headers}
+        if status_code != 204 and b'content-type' not in names:
+            raw_headers.append(
+                (b'content-type', _CONTENT_TYPES[Media.PLAIN_TEXT])
+            )
+        if (
+            body is not None
+            and status_code not in _STATUSES_WITHOUT_CONTENT_LENGTH
+            and b'content-length' not in names
+        ):
+            raw_headers.append((b'content-length', b'%d' % len(body)))
+        return raw_headers
 
     async def __call__(self, receive, send):
         """Build and send the response."""
         if self.status_code is None:
             self.status_code = 200
+        status_code = self.status_code
+        await self.serialize_media()
 
-        if self.status_code != 204:
-            self.headers.setdefault('content-type', Media.PLAIN_TEXT)
+        if self._stream is not None:
+            await send(
+                {
+                    'type': 'http.response.start',
+                    'status': status_code,
+                    'headers': self._encode_headers(status_code, None),
+                }
+            )
+            await send_stream(self._stream, receive, send)
+            return
 
-        response = _Response(
-            content=self._content,
-            headers=self.headers,
-            status_code=self.status_code,
+        body = self._encode_body()
+        await send(
+            {
+                'type': 'http.response.start',
+                'status': status_code,
+                'headers': self._encode_headers(status_code, body),
+            }
         )
-        await response(receive, send)
+        await send({'type': 'http.response.body', 'body': body})
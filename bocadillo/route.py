@@ -1,50 +1,143 @@
-from collections import defaultdict
-from functools import wraps
 from http import HTTPStatus
-from typing import Optional, List, Union, Callable, Dict
+from types import MappingProxyType
+from typing import (
+    Optional,
+    List,
+    Union,
+    Callable,
+    Dict,
+    Mapping,
+    NamedTuple,
+    Tuple,
+)
+
+from .converters import Converter, get_default_converters
+from .exceptions import HTTPError
+from .executors import Executor, ProcessExecutor
+from .hooks import (
+    HookFunction,
+    Hook,
+    HookSpec,
+    BEFORE,
+    AFTER,
+    HOOKS_ATTRIBUTE,
+    create_hook,
+    get_hooks,
+)
+from .patterns import CompiledPattern
+from .view import View, CallableView, create_callable_view, get_method_views
 
-from parse import parse
 
-from .compat import call_async
-from .exceptions import HTTPError
-from .hooks import HookFunction, BEFORE, AFTER, empty_hook
-from .view import View, create_callable_view
+class Pipeline(NamedTuple):
+    """The sequence of coroutines called to process a request."""
+
+    before: Tuple[Hook, ...]
+    view: CallableView
+    after: Tuple[Hook, ...]
 
 
 class Route:
     """Represents a route to a view.
 
-    Formatted string syntax is used for route patterns.
+    Formatted string syntax is used for route patterns. The pattern is
+    compiled once, using the given registry of converters.
+
+    Synchronous views are run using the given executor, and process-bound
+    views and hooks are run using the given process executor.
     """
 
-    def __init__(self, pattern: str, view: View, methods: List[str], name: str):
+    def __init__(
+        self,
+        pattern: str,
+        view: View,
+        methods: List[str],
+        name: str,
+        converters: Dict[str, Converter] = None,
+        executor: Executor = None,
+        process_executor: ProcessExecutor = None,
+    ):
+        if converters is None:
+            converters = get_default_converters()
         self._pattern = pattern
-
-        self._view = create_callable_view(view=view)
-        self._methods = methods
+        self._view = view
+        self._executor = executor
+        self._process_executor = process_executor
+        self._compiled = CompiledPattern(pattern, converters)
+
+        # Method -> view function, resolved once.
+        self._views: Dict[str, Callable] = get_method_views(
+            view=view, methods=methods
+        )
+        self._method_not_allowed_headers = MappingProxyType(
+            {'allow': ', '.join(self._views)}
+        )
         self._name = name
 
-        self.hooks: Dict[str, HookFunction] = defaultdict(lambda: empty_hook)
+        self.hooks: Dict[str, List[HookSpec]] = {BEFORE: [], AFTER: []}
+        self._pipelines: Mapping[str, Pipeline] = {}
+        self._compile()
+
+    def _compile(self):
+        """Build the request processing pipeline for each HTTP method.
+
+        Route hooks wrap hooks attached to the view function itself
+        (e.g. on a class-based view method).
+        """
+        callable_views = {}
+        pipelines = {}
+        for method, view in self._views.items():
+            if view not in callable_views:
+                callable_views[view] = create_callable_view(
+                    view,
+                    executor=self._executor,
+                    process_executor=self._process_executor,
+                )
+            view_hooks = get_hooks(view)
+            pipelines[method] = Pipeline(
+                before=self._create_hooks(
+                    *self.hooks[BEFORE], *view_hooks[BEFORE]
+                ),
+                view=callable_views[view],
+                after=self._create_hooks(
+                    *view_hooks[AFTER], *self.hooks[AFTER]
+                ),
+            )
+        self._pipelines = MappingProxyType(pipelines)
+
+    def _create_hooks(self, *specs: HookSpec) -> Tuple[Hook, ...]:
+        return tuple(
+            create_hook(spec, process_executor=self._process_executor)
+            for spec in specs
+        )
+
+    @property
+    def pattern(self) -> str:
+        return self._pattern
+
+    @property
+    def view(self) -> View:
+        return self._view
+
+    @property
+    def compiled_pattern(self) -> CompiledPattern:
+        return self._compiled
 
     def url(self, **kwargs) -> str:
         """Return full path for the given route parameters."""
-        return self._pattern.format(**kwargs)
+        return self._compiled.format(**kwargs)
 
     def match(self, path: str) -> Optional[dict]:
         """Return whether the route matches the given path.
 
         Examples
         -------
-        >>> route = Route('/{age:d}', lambda req, res: None)
+        >>> route = Route('/{age:int}', lambda req, res: None)
         >>> route.match('/42')
         {'age': 42}
         >>> route.match('/john')
         None
         """
-        result = parse(self._pattern, path)
-        if result is not None:
-            return result.named
-        return None
+        return self._compiled.matcher.match(path)
 
     @classmethod
     def before_hook(cls, hook_function: HookFunction, *args, **kwargs):
@@ -65,43 +158,41 @@ class Route:
             - On top of a class-based view (before @api.route()).
             - On a class-based view method.
 
+            Hooks are called in the order they are declared (top to bottom).
+            Since decorators are applied bottom to top, each new hook
+            is inserted first.
+
             Parameters
             ----------
             hookable : Route or (unbound) class method
             """
-            nonlocal hook_function
-            full_hook_function = hook_function
-
-            async def hook_function(req, res, params):
-                return await call_async(
-                    full_hook_function, req, res, params, *args, **kwargs
-                )
+            spec = HookSpec(function=hook_function, args=args, kwargs=kwargs)
 
             if isinstance(hookable, Route):
                 route = hookable
-                route.hooks[hook] = hook_function
+                route.hooks[hook].insert(0, spec)
+                route._compile()
                 return route
             else:
                 view: Callable = hookable
-
-                @wraps(view)
-                async def with_hook(self, req, res, **kw):
-                    if hook == BEFORE:
-                        await hook_function(req, res, kw)
-                    await call_async(view, self, req, res, **kw)
-                    if hook == AFTER:
-                        await hook_function(req, res, kw)
-
-                return with_hook
+                if HOOKS_ATTRIBUTE not in view.__dict__:
+                    setattr(view, HOOKS_ATTRIBUTE, {BEFORE: [], AFTER: []})
+                get_hooks(view)[hook].insert(0, spec)
+                return view
 
         return decorator
 
     def raise_for_method(self, request):
-        if request.method not in self._methods:
-            raise HTTPError(status=HTTPStatus.METHOD_NOT_ALLOWED)
+        if request.method not in self._pipelines:
+            raise HTTPError(
+                status=HTTPStatus.METHOD_NOT_ALLOWED,
+                headers=self._method_not_allowed_headers,
+            )
 
     async def __call__(self, request, response, **kwargs) -> None:
-        view = self._view
-        await call_async(self.hooks[BEFORE], request, response, kwargs)
+        before, view, after = self._pipelines[request.method]
+        for hook in before:
+            await hook(request, response, kwargs)
         await view(request, response, **kwargs)
-        await call_async(self.hooks[AFTER], request, response, kwargs)
+        for hook in after:
+            await hook(request, response, kwargs)
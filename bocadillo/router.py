@@ -0,0 +1,193 @@
+"""Segment trie used to resolve a URL path into a route.
+
+Route patterns are compiled into path segments (e.g. `'/add/{x:int}/{y:int}'`
+gives `'add'`, `'{x:int}'` and `'{y:int}'`) when the route is declared.
+
+At lookup time, the router walks the trie one segment at a time. At each node,
+literal segments are tried first (a single dict lookup), then typed parameter
+segments (e.g. `{x:int}`), then untyped ones (e.g. `{x}`). Parameters that
+span across segments (e.g. `{filepath:path}`) are tried last, against the
+rest of the path. This means that the cost of resolving a path depends on its
+depth, not on the number of routes.
+
+Parameter segments are indexed by shape, regardless of parameter names (e.g.
+`{id:int}` and `{pk:int}` share a node), and the names are looked up on the
+matched route.
+
+Optionally, resolutions can be cached by path. Paths that match no route
+are cached separately, so that they cannot evict frequently matched paths.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from .cache import CacheInfo, LRUCache
+from .patterns import Matcher, Segment, split_path
+from .route import Route
+
+
+class _Node:
+    """A node of the route trie."""
+
+    __slots__ = ('literals', 'parameters', 'tails', 'route')
+
+    def __init__(self):
+        self.literals: Dict[str, '_Node'] = {}
+        # Segment shape -> (matcher, child node). Parameter names are not
+        # part of the shape, so that e.g. `{id}` and `{pk}` share a child.
+        # Kept sorted so that typed segments are tried before untyped ones.
+        self.parameters: Dict[str, Tuple[Matcher, '_Node']] = {}
+        # Tail shape -> (matcher, route).
+        self.tails: Dict[str, Tuple[Matcher, Route]] = {}
+        self.route: Optional[Route] = None
+
+    def child(self, segment: Segment) -> '_Node':
+        if isinstance(segment, str):
+            return self.literals.setdefault(segment, _Node())
+
+        if segment.shape not in self.parameters:
+            self.parameters[segment.shape] = (segment, _Node())
+            # NOTE: sorting is stable, so insertion order is preserved
+            # within typed and untyped segments.
+            self.parameters = dict(
+                sorted(
+                    self.parameters.items(),
+                    key=lambda item: not item[1][0].typed,
+                )
+            )
+
+        return self.parameters[segment.shape][1]
+
+
+def _replaces(route: Route, existing: Optional[Route]) -> bool:
+    # Routes whose patterns only differ by parameter names match the same
+    # paths: the first one declared wins, unless it is redeclared.
+    return existing is None or existing.pattern == route.pattern
+
+
+class Router:
+    """Registry of routes, indexed by URL pattern segments.
+
+    # Parameters
+    cache_size (int):
+        The maximum number of resolved paths to cache. The same number of
+        unresolved (404) paths is cached in a separate space.
+        Defaults to `0` (no caching).
+    """
+
+    def __init__(self, cache_size: int = 0):
+        self._root = _Node()
+        self._found = LRUCache(maxsize=cache_size)
+        self._not_found = LRUCache(maxsize=cache_size)
+
+    def add(self, route: Route):
+        """Register a route.
+
+        If a route was already registered for the same pattern, it is replaced.
+        """
+        compiled = route.compiled_pattern
+        node = self._root
+        for segment in compiled.segments:
+            node = node.child(segment)
+
+        if compiled.tail is not None:
+            shape = compiled.tail.shape
+            if _replaces(route, node.tails.get(shape, (None, None))[1]):
+                node.tails[shape] = (compiled.tail, route)
+        elif _replaces(route, node.route):
+            node.route = route
+
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Invalidate cached path resolutions."""
+        self._found.clear()
+        self._not_found.clear()
+
+    def cache_info(self) -> Dict[str, CacheInfo]:
+        """Return statistics about cached resolutions of matched
+        (`'found'`) and unmatched (`'not_found'`) paths.
+
+        Each lookup is counted in one cache only, i.e. resolving a path
+        which matches a route is a miss of the `'found'` cache, and
+        resolving a path which matches no route is a miss of the
+        `'not_found'` cache."""
+        return {
+            'found': self._found.info(),
+            'not_found': self._not_found.info(),
+        }
+
+    def match(self, path: str) -> Tuple[Optional[Route], dict]:
+        """Find the route matching a path and extract its parameters.
+
+        # Returns
+        route_and_params (tuple):
+            The matching route (or `None` if no route matches) and a dict of
+            (converted) route parameters.
+        """
+        if self._found.maxsize <= 0:
+            return self._resolve(path)
+
+        # NOTE: membership is checked first so that a lookup only counts
+        # as a hit or a miss in the cache of its outcome, e.g. a new 404
+        # is a miss of the `not_found` cache only.
+        if path in self._found:
+            resolved = self._found.get(path)
+            if resolved is not None:
+                route, params = resolved
+                return route, dict(params)
+        elif path in self._not_found and self._not_found.get(path, False):
+            return None, {}
+
+        route, params = self._resolve(path)
+        if route is None:
+            self._not_found.record_miss()
+            self._not_found.set(path, True)
+        else:
+            self._found.record_miss()
+            self._found.set(path, (route, params))
+            params = dict(params)
+        return route, params
+
+    def _resolve(self, path: str) -> Tuple[Optional[Route], dict]:
+        resolved = self._match(self._root, split_path(path), 0, [])
+        if resolved is None:
+            return None, {}
+        return resolved
+
+    def _match(
+        self, node: _Node, segments: List[str], index: int, values: list
+    ) -> Optional[Tuple[Route, dict]]:
+        # NOTE: `values` are the converted parameters of matched segments,
+        # whose names are stored on the route.
+        if index == len(segments):
+            route = node.route
+            if route is None:
+                return None
+            return route, dict(zip(route.compiled_pattern.names, values))
+
+        segment = segments[index]
+
+        child = node.literals.get(segment)
+        if child is not None:
+            resolved = self._match(child, segments, index + 1, values)
+            if resolved is not None:
+                return resolved
+
+        for matcher, child in node.parameters.values():
+            segment_values = matcher.match_values(segment)
+            if segment_values is None:
+                continue
+            resolved = self._match(
+                child, segments, index + 1, values + segment_values
+            )
+            if resolved is not None:
+                return resolved
+
+        if node.tails:
+            rest = '/'.join(segments[index:])
+            for matcher, route in node.tails.values():
+                params = matcher.match(rest)
+                if params is not None:
+                    params.update(zip(route.compiled_pattern.names, values))
+                    return route, params
+
+        return None
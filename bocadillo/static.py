@@ -1,14 +1,586 @@
-from whitenoise import WhiteNoise
+"""Serving of static files.
 
-from .compat import empty_wsgi_app
-from .types import WSGIApp
+Files are indexed when the static app is created: their size, modification
+time and response headers are computed once, so that serving a file doesn't
+require any filesystem access other than reading it. As a result, files added
+after the app was created are not served.
 
+- Small files are kept in an in-memory LRU cache.
+- Large files are sent in chunks, using the `http.response.zerocopysend`
+ASGI extension when the server supports it.
+- `ETag` and `Last-Modified` headers are sent, and conditional requests
+(`If-None-Match`, `If-Modified-Since`) get a `304 Not Modified` response.
+- Single byte ranges are supported (`Range` and `If-Range` headers).
 
-def static(directory: str) -> WSGIApp:
-    """Return a WSGI app that serves static files under the given directory.
+Fingerprinted copies of files (e.g. `css/app.3f2a9c1b5d7e.css`) can be built
+with #~some.static.build_static(), which also writes a manifest mapping
+original paths to fingerprinted ones. Since the content of a fingerprinted
+file never changes, it is served with far-future cache headers.
 
-    Powered by WhiteNoise.
+#~some.static.build_static() also writes compressed variants of text-based
+files (`.gz`, and `.br` if [brotli](https://github.com/google/brotli) is
+installed). When a request's `Accept-Encoding` header allows it, the best
+variant is served instead of the original file.
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import warnings
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from .cache import LRUCache
+from .streaming import send_stream
+from .types import ASGIApp, ASGIAppInstance
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Files smaller than this (in bytes) are kept in memory.
+MAX_CACHED_FILE_SIZE = 256 * 1024
+# Number of files kept in memory.
+CACHE_SIZE = 256
+# Size of chunks used to send large files.
+CHUNK_SIZE = 64 * 1024
+# Name of the manifest written by `build_static()`.
+MANIFEST_NAME = 'staticfiles.json'
+# Cache duration of fingerprinted files (one year), in seconds.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Number of hex digits of the content hash included in fingerprinted names.
+HASH_LENGTH = 12
+# Files smaller than this (in bytes) are not worth compressing.
+MIN_COMPRESSED_FILE_SIZE = 256
+# Content codings of compressed variants, by order of preference,
+# mapped to the suffix of variant files.
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+# Content types (other than `text/*`) which benefit from compression.
+COMPRESSIBLE_TYPES = frozenset(
+    (
+        'application/javascript',
+        'application/json',
+        'application/manifest+json',
+        'application/wasm',
+        'application/xml',
+        'image/svg+xml',
+    )
+)
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+class StaticFile(NamedTuple):
+    """An entry of the static files index."""
+
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    headers: RawHeaders
+    # Content coding -> compressed variant.
+    variants: Dict[str, 'StaticFile']
+
+
+def _get_content_type(path: str) -> str:
+    content_type, encoding = mimetypes.guess_type(path)
+    if encoding is not None:
+        # E.g. `.tar.gz`: the file is served as is, not decompressed.
+        return _ARCHIVE_TYPES.get(encoding, 'application/octet-stream')
+    if content_type is None:
+        return 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in (
+        'application/javascript',
+        'application/json',
+    ):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+_ARCHIVE_TYPES = {
+    'gzip': 'application/gzip',
+    'br': 'application/x-brotli',
+    'bzip2': 'application/x-bzip2',
+    'xz': 'application/x-xz',
+}
+
+
+def _is_compressible(path: str) -> bool:
+    content_type, encoding = mimetypes.guess_type(path)
+    if encoding is not None or content_type is None:
+        return False
+    return content_type.startswith('text/') or (
+        content_type in COMPRESSIBLE_TYPES
+    )
+
+
+def _index_file(
+    path: str,
+    cache_control: str,
+    content_type: str = None,
+    encoding: str = None,
+    variants: Dict[str, StaticFile] = None,
+) -> StaticFile:
+    stat = os.stat(path)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    if content_type is None:
+        content_type = _get_content_type(path)
+    headers = [
+        (b'content-type', content_type.encode()),
+        (b'etag', etag.encode()),
+        (b'last-modified', formatdate(stat.st_mtime, usegmt=True).encode()),
+        (b'accept-ranges', b'bytes'),
+        (b'cache-control', cache_control.encode()),
+    ]
+    if encoding is not None:
+        headers.append((b'content-encoding', encoding.encode()))
+    if encoding is not None or variants:
+        headers.append((b'vary', b'Accept-Encoding'))
+    return StaticFile(
+        path=path,
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        etag=etag,
+        headers=headers,
+        variants=variants or {},
+    )
+
+
+@lru_cache(maxsize=128)
+def _parse_accept_encoding(value: str) -> Tuple[str, ...]:
+    """Return the acceptable codings among `ENCODINGS`, best first."""
+    qualities = {}
+    for part in value.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, param_value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(param_value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    preference = list(ENCODINGS)
+    accepted = [
+        coding
+        for coding in preference
+        if qualities.get(coding, qualities.get('*', 0)) > 0
+    ]
+    return tuple(
+        sorted(
+            accepted,
+            key=lambda coding: (
+                -qualities.get(coding, qualities.get('*', 0)),
+                preference.index(coding),
+            ),
+        )
+    )
+
+
+def _gzip(content: bytes) -> bytes:
+    buffer = io.BytesIO()
+    # A fixed mtime makes builds reproducible.
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+
+def _get_compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors = {}
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    compressors['gzip'] = _gzip
+    return compressors
+
+
+def _is_variant(path: str) -> bool:
+    return path.endswith(tuple(ENCODINGS.values()))
+
+
+def _compress(path: str):
+    with open(path, 'rb') as f:
+        content = f.read()
+    for encoding, compress in _get_compressors().items():
+        variant_path = path + ENCODINGS[encoding]
+        compressed = None
+        if len(content) >= MIN_COMPRESSED_FILE_SIZE:
+            compressed = compress(content)
+        if compressed is None or len(compressed) >= len(content):
+            # Not worth it: remove variants of previous builds, if any.
+            if os.path.exists(variant_path):
+                os.remove(variant_path)
+            continue
+        with open(variant_path, 'wb') as f:
+            f.write(compressed)
+
+
+def _fingerprint(path: str, content: bytes) -> str:
+    root, ext = os.path.splitext(path)
+    digest = hashlib.md5(content).hexdigest()[:HASH_LENGTH]
+    return f'{root}.{digest}{ext}'
+
+
+# Matches names written by `_fingerprint()`, e.g. `app.3f2a9c1b5d7e.css`.
+_FINGERPRINTED = re.compile(r'\.[0-9a-f]{%d}(\.[^./]*)?$' % HASH_LENGTH)
+
+
+def _is_fingerprinted(path: str) -> bool:
+    return _FINGERPRINTED.search(os.path.basename(path)) is not None
+
+
+def load_manifest(directory: str) -> Dict[str, str]:
+    """Load the manifest of fingerprinted files of a static directory.
+
+    # Returns
+    manifest (dict):
+        Maps paths relative to `directory` (e.g. `'css/app.css'`) to the path
+        of their fingerprinted copy. Empty if no manifest was built.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def build_static(directory: str, compress: bool = True) -> Dict[str, str]:
+    """Write fingerprinted copies of static files, along with a manifest.
+
+    Each file gets a copy whose name includes a hash of its content,
+    e.g. `css/app.css` is copied to `css/app.3f2a9c1b5d7e.css`.
+    Copies written by previous builds (i.e. files whose name ends with
+    a 12-digit hex hash, optionally followed by an extension) are not
+    fingerprinted again, which allows running this function on every
+    deployment.
+
+    # Parameters
+    directory (str): the directory containing static files.
+    compress (bool):
+        Whether to write compressed variants of text-based files
+        (e.g. `css/app.css.gz`). Variants which are not smaller than the
+        original file are not written. Defaults to `True`.
+
+    # Returns
+    manifest (dict): see #~some.static.load_manifest().
+    """
+    manifest = {}
+
+    for root, _, filenames in os.walk(directory, followlinks=True):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            key = os.path.relpath(path, directory).replace(os.sep, '/')
+            if (
+                key == MANIFEST_NAME
+                or _is_variant(key)
+                or _is_fingerprinted(key)
+            ):
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            hashed = _fingerprint(key, content)
+            hashed_path = os.path.join(directory, *hashed.split('/'))
+            if not os.path.exists(hashed_path):
+                with open(hashed_path, 'wb') as f:
+                    f.write(content)
+            manifest[key] = hashed
+
+    with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if compress:
+        for root, _, filenames in os.walk(directory, followlinks=True):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if _is_compressible(path):
+                    _compress(path)
+
+    return manifest
+
+
+# A single byte range, e.g. `bytes=0-499`, `bytes=500-` or `bytes=-500`.
+_BYTE_RANGE = re.compile(r'\s*bytes\s*=\s*([0-9]*)\s*-\s*([0-9]*)\s*$')
+
+
+def _parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a `Range` header into an inclusive `(start, end)` byte range.
+
+    Return `None` if the header should be ignored, i.e. if it is malformed
+    or contains multiple ranges.
+
+    # Raises
+    ValueError: if the range cannot be satisfied.
+    """
+    match = _BYTE_RANGE.match(value)
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not (start or end):
+        return None
+    if not start:
+        # Suffix range, e.g. the last 500 bytes.
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError(value)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        # Invalid syntax, see RFC 7233, section 2.1.
+        return None
+    if start >= size:
+        raise ValueError(value)
+    end = int(end) if end else size - 1
+    return start, min(end, size - 1)
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _read_chunks(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class StaticFiles:
+    """ASGI app that serves files under a directory.
+
+    # Parameters
+    directory (str): the directory containing static files.
+    max_age (int):
+        The `max-age` of the `Cache-Control` header, in seconds.
+        Defaults to `60`. Fingerprinted files listed in the manifest
+        (see #~some.static.build_static()) are always cached for a year.
+
+    # Attributes
+    manifest (dict): see #~some.static.load_manifest().
+    """
+
+    def __init__(self, directory: str, max_age: int = 60):
+        self.directory = os.path.abspath(directory)
+        self.max_age = max_age
+        self._cache = LRUCache(maxsize=CACHE_SIZE)
+        self._files: Dict[str, StaticFile] = {}
+        self.manifest: Dict[str, str] = {}
+        self._index()
+
+    def _index(self):
+        if not os.path.isdir(self.directory):
+            warnings.warn(f'No directory at: {self.directory}')
+            return
+        self.manifest = load_manifest(self.directory)
+        fingerprinted = set(self.manifest.values())
+
+        paths = {}
+        for root, _, filenames in os.walk(self.directory, followlinks=True):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                key = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                paths[key] = path
+
+        for key, path in paths.items():
+            if key in fingerprinted:
+                cache_control = (
+                    f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+                )
+            else:
+                cache_control = f'max-age={self.max_age}, public'
+
+            variants = {}
+            for encoding, suffix in ENCODINGS.items():
+                variant_path = paths.get(key + suffix)
+                if variant_path is None:
+                    continue
+                # Ignore variants which were not rebuilt after the file changed.
+                if os.path.getmtime(variant_path) < os.path.getmtime(path):
+                    continue
+                variants[encoding] = _index_file(
+                    variant_path,
+                    cache_control,
+                    content_type=_get_content_type(path),
+                    encoding=encoding,
+                )
+
+            self._files['/' + key] = _index_file(
+                path, cache_control, variants=variants
+            )
+
+    def url(self, path: str) -> str:
+        """Return the path of the fingerprinted copy of a file, if any.
+
+        # Parameters
+        path (str): a path relative to `directory`, e.g. `'css/app.css'`.
+
+        # Returns
+        path (str):
+            The path of the fingerprinted copy, or `path` if the file
+            is not in the manifest.
+        """
+        return self.manifest.get(path, path)
+
+    def find(self, path: str) -> Optional[StaticFile]:
+        """Return the indexed file at the given URL path, if any."""
+        return self._files.get(path)
+
+    @staticmethod
+    def _select_variant(file: StaticFile, headers: Headers) -> StaticFile:
+        if not file.variants:
+            return file
+        accept_encoding = headers.get('accept-encoding', '')
+        for encoding in _parse_accept_encoding(accept_encoding):
+            variant = file.variants.get(encoding)
+            if variant is not None:
+                return variant
+        return file
+
+    def __call__(self, scope: dict) -> ASGIAppInstance:
+        async def asgi(receive, send):
+            await self._serve(scope, receive, send)
+
+        return asgi
+
+    async def _serve(self, scope: dict, receive, send):
+        method = scope['method']
+        if method not in ('GET', 'HEAD'):
+            await _send_error(
+                send, HTTPStatus.METHOD_NOT_ALLOWED, [(b'allow', b'GET, HEAD')]
+            )
+            return
+
+        file = self.find(scope['path'])
+        if file is None:
+            await _send_error(send, HTTPStatus.NOT_FOUND)
+            return
+
+        headers = Headers(scope=scope)
+        file = self._select_variant(file, headers)
+
+        if self._is_not_modified(file, headers):
+            await _send_start(send, HTTPStatus.NOT_MODIFIED, file.headers)
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        status = HTTPStatus.OK
+        start, end = 0, file.size - 1
+        raw_headers = list(file.headers)
+
+        range_header = headers.get('range')
+        if_range = headers.get('if-range', file.etag)
+        if range_header is not None and if_range == file.etag:
+            try:
+                byte_range = _parse_range(range_header, file.size)
+            except ValueError:
+                await _send_error(
+                    send,
+                    HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                    [(b'content-range', f'bytes */{file.size}'.encode())],
+                )
+                return
+            if byte_range is not None:
+                status = HTTPStatus.PARTIAL_CONTENT
+                start, end = byte_range
+                raw_headers.append(
+                    (
+                        b'content-range',
+                        f'bytes {start}-{end}/{file.size}'.encode(),
+                    )
+                )
+
+        length = end - start + 1
+        raw_headers.append((b'content-length', str(length).encode()))
+        await _send_start(send, status, raw_headers)
+
+        if method == 'HEAD' or length == 0:
+            await send({'type': 'http.response.body', 'body': b''})
+        elif file.size <= MAX_CACHED_FILE_SIZE:
+            content = await self._read_cached(file)
+            await send(
+                {'type': 'http.response.body', 'body': content[start : end + 1]}
+            )
+        elif 'http.response.zerocopysend' in scope.get('extensions', {}):
+            with open(file.path, 'rb') as f:
+                await send(
+                    {
+                        'type': 'http.response.zerocopysend',
+                        'file': f,
+                        'offset': start,
+                        'count': length,
+                    }
+                )
+        else:
+            await send_stream(
+                _read_chunks(file.path, start, length), receive, send
+            )
+
+    async def _read_cached(self, file: StaticFile) -> bytes:
+        content = self._cache.get(file.path)
+        if content is None:
+            content = await run_in_threadpool(_read, file.path)
+            self._cache.set(file.path, content)
+        return content
+
+    @staticmethod
+    def _is_not_modified(file: StaticFile, headers: Headers) -> bool:
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            etags = [etag.strip() for etag in if_none_match.split(',')]
+            return (
+                '*' in etags or file.etag in etags or f'W/{file.etag}' in etags
+            )
+
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(file.mtime) <= since
+
+        return False
+
+
+async def _send_start(send, status: int, headers: RawHeaders):
+    await send(
+        {'type': 'http.response.start', 'status': status, 'headers': headers}
+    )
+
+
+async def _send_error(send, status: HTTPStatus, headers: RawHeaders = None):
+    body = status.phrase.encode()
+    await _send_start(
+        send,
+        status,
+        [
+            (b'content-type', b'text/plain'),
+            (b'content-length', str(len(body)).encode()),
+            *(headers or []),
+        ],
+    )
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def static(directory: str) -> ASGIApp:
+    """Return an ASGI app that serves static files under the given directory.
+
+    See also #~some.static.StaticFiles.
     """
-    app = WhiteNoise(empty_wsgi_app())
-    app.add_files(directory)
-    return app
+    return StaticFiles(directory)
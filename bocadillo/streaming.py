@@ -0,0 +1,111 @@
+"""Sending of response bodies chunk by chunk.
+
+Streams are consumed lazily: a new chunk is only produced once the previous one
+has been sent, so that the ASGI server's flow control (i.e. waiting for the
+client to read data) propagates to the producer. Production stops as soon as
+the client disconnects.
+"""
+import asyncio
+from contextlib import suppress
+from typing import AnyStr, AsyncIterable, AsyncIterator, Iterable, Union
+
+from starlette.concurrency import run_in_threadpool
+
+Stream = Union[AsyncIterable[AnyStr], Iterable[AnyStr]]
+
+_DONE = object()
+
+
+async def iterate_in_threadpool(iterable: Iterable) -> AsyncIterator:
+    """Iterate over a sync iterable without blocking the event loop.
+
+    Each item is produced in the asyncio thread pool. When iteration stops
+    early (e.g. because the client disconnected), the iterator is closed in
+    the thread pool too, so that `finally` blocks of generators are run.
+    """
+    iterator = iter(iterable)
+    pending = None
+    try:
+        while True:
+            pending = asyncio.ensure_future(
+                run_in_threadpool(next, iterator, _DONE)
+            )
+            # Shielded so that, if iteration is cancelled, the `next()` call
+            # can be waited for before closing the iterator.
+            item = await asyncio.shield(pending)
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            if pending is not None and not pending.done():
+                # A generator can't be closed while it is running.
+                with suppress(Exception):
+                    await pending
+            await run_in_threadpool(close)
+
+
+def aiter_stream(stream: Stream) -> AsyncIterator:
+    """Return an async iterator over a sync or async iterable."""
+    if hasattr(stream, '__aiter__'):
+        return stream.__aiter__()
+    return iterate_in_threadpool(stream)
+
+
+async def _send_chunks(chunks: AsyncIterator, send):
+    try:
+        async for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            await send(
+                {'type': 'http.response.body', 'body': chunk, 'more_body': True}
+            )
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _wait_for_disconnect(receive) -> bool:
+    body_complete = False
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return True
+        if body_complete:
+            # ASGI servers are not supposed to send anything but a disconnect
+            # once the request body is complete. If this one does, we can't
+            # know when the client disconnects.
+            return False
+        body_complete = not message.get('more_body', False)
+
+
+async def send_stream(stream: Stream, receive, send):
+    """Send a stream as response body messages.
+
+    The response start message must have been sent already.
+    If the client disconnects, the stream is closed and nothing more is sent.
+    """
+    producer = asyncio.ensure_future(_send_chunks(aiter_stream(stream), send))
+    listener = asyncio.ensure_future(_wait_for_disconnect(receive))
+
+    try:
+        await asyncio.wait(
+            {producer, listener}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if listener.done() and listener.result():
+            return
+        await producer
+    finally:
+        # E.g. the client disconnected, the stream is complete, or one of
+        # the tasks failed: make sure neither is left running.
+        for task in (producer, listener):
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            elif not task.cancelled():
+                # Mark any exception as retrieved.
+                task.exception()
@@ -1,14 +1,166 @@
-from typing import List
+from typing import AsyncIterator, Iterable, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import (
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
 from jinja2 import Template as _Template
 
+from .fragment_cache import FragmentCache, FragmentCacheExtension
+
 Template = _Template
 
+# Minimum size (in characters) of chunks of streamed templates.
+STREAM_CHUNK_SIZE = 4096
+# Extensions of files compiled by `compile_templates()`.
+TEMPLATE_EXTENSIONS = ('html', 'htm', 'xml', 'txt', 'jinja', 'jinja2', 'j2')
+
+
+class _ModeAwareBytecodeCache(BytecodeCache):
+    """Keep the bytecode of sync and async templates apart.
+
+    Jinja generates different code for sync and async rendering, but bytecode
+    caches only key templates by name and file name.
+    """
+
+    def __init__(self, cache: BytecodeCache):
+        self.cache = cache
+
+    def get_bucket(self, environment, name, filename, source):
+        if environment.is_async:
+            name = f'{name}#async'
+        return self.cache.get_bucket(environment, name, filename, source)
+
+    def set_bucket(self, bucket):
+        self.cache.set_bucket(bucket)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def get_default_bytecode_cache(directory: str = None) -> BytecodeCache:
+    """Return a filesystem-backed bytecode cache.
+
+    # Parameters
+    directory (str):
+        Where compiled templates are stored. Defaults to a directory
+        in the system's temporary directory, private to the current user.
+    """
+    return FileSystemBytecodeCache(directory)
+
+
+def get_bytecode_cache(environment: Environment) -> Optional[BytecodeCache]:
+    cache = environment.bytecode_cache
+    return cache.cache if cache is not None else None
+
+
+def set_bytecode_cache(
+    environment: Environment, cache: Optional[BytecodeCache]
+):
+    if cache is not None:
+        cache = _ModeAwareBytecodeCache(cache)
+    environment.bytecode_cache = cache
+
+
+def set_fragment_cache(environment: Environment, cache: FragmentCache):
+    environment.fragment_cache = cache
 
-def get_templates_environment(template_dirs: List[str]):
-    return Environment(
+
+def get_templates_environment(
+    template_dirs: List[str],
+    bytecode_cache: Optional[BytecodeCache] = None,
+    auto_reload: bool = True,
+):
+    environment = Environment(
         loader=FileSystemLoader(template_dirs),
         autoescape=select_autoescape(['html', 'xml']),
         enable_async=True,
+        auto_reload=auto_reload,
+        extensions=[FragmentCacheExtension],
+    )
+    set_bytecode_cache(environment, bytecode_cache)
+    return environment
+
+
+def get_sync_environment(environment: Environment) -> Environment:
+    """Return a sync counterpart of an async templates environment.
+
+    Both environments share the same loader, globals, filters and bytecode
+    cache, but compiled templates are cached separately because Jinja
+    generates different code for sync and async rendering.
+    """
+    sync_environment = environment.overlay()
+    sync_environment.is_async = False
+    return sync_environment
+
+
+def compile_templates(
+    template_dirs: List[str],
+    bytecode_cache: BytecodeCache,
+    extensions: Iterable[str] = TEMPLATE_EXTENSIONS,
+) -> List[str]:
+    """Compile templates ahead of time and store them in a bytecode cache.
+
+    Templates are compiled for both sync and async rendering.
+
+    # Parameters
+    template_dirs (list of str): directories containing templates.
+    bytecode_cache (BytecodeCache): where compiled templates are stored.
+    extensions (iterable of str):
+        Extensions (without the leading dot) of files to compile. Other files,
+        e.g. images, are ignored. Defaults to `TEMPLATE_EXTENSIONS`.
+
+    # Returns
+    names (list of str): names of the compiled templates.
+
+    # Raises
+    TemplateSyntaxError: if a template is invalid.
+    UnicodeDecodeError: if a template is not valid UTF-8.
+    OSError: if a template cannot be read.
+    """
+    environment = get_templates_environment(
+        template_dirs, bytecode_cache=bytecode_cache
     )
+    names = environment.list_templates(extensions=list(extensions))
+    for env in (environment, get_sync_environment(environment)):
+        for name in names:
+            env.get_template(name)
+    return names
+
+
+async def stream_template(
+    template: Template, context: dict, chunk_size: int = None
+) -> AsyncIterator[bytes]:
+    """Render a template asynchronously, chunk by chunk.
+
+    Jinja produces many small strings (one for each piece of text or
+    expression), which are buffered into chunks of at least `chunk_size`
+    characters, so that each chunk is worth sending over the network.
+
+    # Parameters
+    template (Template): a template from an async environment.
+    context (dict): context variables to inject in the template.
+    chunk_size (int):
+        The minimum size of chunks, except for the last one.
+        If `0`, each string produced by Jinja is a chunk.
+        Defaults to `STREAM_CHUNK_SIZE`.
+
+    # Returns
+    chunks (async iterator): UTF-8 encoded chunks of the rendered template.
+    """
+    if chunk_size is None:
+        chunk_size = STREAM_CHUNK_SIZE
+    buffer = []
+    size = 0
+    async for event in template.generate_async(context):
+        buffer.append(event)
+        size += len(event)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
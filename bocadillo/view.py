@@ -1,9 +1,11 @@
 import asyncio
 import inspect
-from typing import Callable, Union, Coroutine
+from typing import Callable, Coroutine, Dict, Iterable, Union
 
-from .compat import call_async
 from .constants import ALL_HTTP_METHODS
+from .exceptions import RouteDeclarationError
+from .executors import DEFAULT, Executor, ProcessExecutor, ThreadExecutor
+from .processes import is_process_bound, run_view
 from .request import Request
 from .response import Response
 
@@ -32,32 +34,62 @@ CallableView = Callable[[Request, Response, dict], Coroutine]
 View = Union[CallableView, ClassBasedView]
 
 
-def create_callable_view(view: View) -> CallableView:
-    """Create callable view from function (sync/async) or class based view."""
+def get_method_views(view: View, methods: Iterable[str]) -> Dict[str, Callable]:
+    """Return the view function to call for each HTTP method.
+
+    Function views (sync or async) are used for every method.
+    Class-based views use their `.handle()` method if present,
+    or the method named after the HTTP method otherwise.
+    """
+    if inspect.isfunction(view) or asyncio.iscoroutinefunction(view):
+        return {method: view for method in methods}
+    return {method: _find_for_method(view, method) for method in methods}
+
+
+def create_callable_view(
+    view: Callable,
+    executor: Executor = None,
+    process_executor: ProcessExecutor = None,
+) -> CallableView:
+    """Create a callable view from a sync or async view function.
+
+    Sync view functions are run using the given `executor`,
+    which defaults to the event loop's default thread pool.
+    Process-bound view functions are run using the `process_executor`,
+    unless `executor` is a process executor itself.
+    """
     if asyncio.iscoroutinefunction(view):
         return view
-    elif inspect.isfunction(view):
+
+    if executor is None:
+        executor = ThreadExecutor(DEFAULT)
+
+    if is_process_bound(view) and not isinstance(executor, ProcessExecutor):
+        if process_executor is None:
+            raise RouteDeclarationError(
+                f'View "{get_view_name(view)}" is process-bound but '
+                'no process executor is available.'
+            )
+        executor = process_executor
+
+    if isinstance(executor, ProcessExecutor):
 
         async def callable_view(req, res, **kwargs):
-            await call_async(view, req, res, sync=True, **kwargs)
+            await run_view(executor, view, req, res, **kwargs)
 
-        return callable_view
     else:
-        return _from_class_instance(view)
 
+        async def callable_view(req, res, **kwargs):
+            await executor.run(view, req, res, **kwargs)
 
-def _from_class_instance(view: ClassBasedView):
-    def _find_for_method(method: str):
-        try:
-            return getattr(view, 'handle')
-        except AttributeError:
-            return getattr(view, method.lower())
+    return callable_view
 
-    async def callable_view(req, res, **kwargs):
-        view_ = _find_for_method(req.method)
-        await call_async(view_, req, res, **kwargs)
 
-    return callable_view
+def _find_for_method(view: ClassBasedView, method: str) -> Callable:
+    try:
+        return getattr(view, 'handle')
+    except AttributeError:
+        return getattr(view, method.lower())
 
 
 def get_view_name(view: View, base: ClassBasedView = None) -> str:
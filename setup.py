@@ -22,9 +22,7 @@ setuptools.setup(
         'uvicorn',
         'jinja2',
         'asgiref',
-        'whitenoise',
         'requests',
-        'parse',
     ],
     url='https://github.com/bocadilloproject/bocadillo',
     license='MIT',
@@ -1,5 +1,66 @@
-from subprocess import call
+from subprocess import PIPE, call, run
 
 
 def test_can_call_boca():
     assert call(['boca']) == 0
+
+
+def test_static_build(tmpdir):
+    tmpdir.join('app.css').write('h1 { color: red; }')
+    assert call(['boca', 'static:build', '-d', str(tmpdir)]) == 0
+    assert tmpdir.join('staticfiles.json').check()
+
+
+def test_static_build_fails_if_no_directory(tmpdir):
+    directory = str(tmpdir.join('missing'))
+    assert call(['boca', 'static:build', '-d', directory]) != 0
+
+
+def test_templates_compile(tmpdir):
+    templates_dir = tmpdir.mkdir('templates')
+    templates_dir.join('index.html').write('<h1>{{ title }}</h1>')
+    cache_dir = tmpdir.mkdir('cache')
+    assert call([
+        'boca', 'templates:compile',
+        '-d', str(templates_dir), '-c', str(cache_dir),
+    ]) == 0
+    # One compiled template for each of sync and async rendering.
+    assert len(cache_dir.listdir()) == 2
+
+
+def test_templates_compile_fails_if_template_is_invalid(tmpdir):
+    tmpdir.join('index.html').write('{% if %}')
+    assert call(['boca', 'templates:compile', '-d', str(tmpdir)]) != 0
+
+
+def test_templates_compile_ignores_other_files(tmpdir):
+    templates_dir = tmpdir.mkdir('templates')
+    templates_dir.join('index.html').write('<h1>{{ title }}</h1>')
+    templates_dir.join('logo.png').write_binary(b'\x89PNG\r\n\x1a\n\xff')
+    cache_dir = tmpdir.mkdir('cache')
+    assert call([
+        'boca', 'templates:compile',
+        '-d', str(templates_dir), '-c', str(cache_dir),
+    ]) == 0
+    assert len(cache_dir.listdir()) == 2
+
+
+def test_templates_compile_creates_cache_dir(tmpdir):
+    templates_dir = tmpdir.mkdir('templates')
+    templates_dir.join('index.html').write('<h1>{{ title }}</h1>')
+    cache_dir = tmpdir.join('build', 'jinja')
+    assert call([
+        'boca', 'templates:compile',
+        '-d', str(templates_dir), '-c', str(cache_dir),
+    ]) == 0
+    assert len(cache_dir.listdir()) == 2
+
+
+def test_templates_compile_fails_if_template_is_not_text(tmpdir):
+    tmpdir.join('index.html').write_binary(b'\xff\xfe')
+    output = run(
+        ['boca', 'templates:compile', '-d', str(tmpdir), '-c', str(tmpdir)],
+        stderr=PIPE,
+    )
+    assert output.returncode != 0
+    assert b'Traceback' not in output.stderr
@@ -0,0 +1,117 @@
+import pytest
+
+from bocadillo import API, Media
+from bocadillo.media import parse_accept
+from bocadillo.response import _add_vary
+
+
+@pytest.fixture
+def api():
+    api = API()
+
+    @api.route('/')
+    async def index(req, res):
+        res.media = iter([{'id': 1}])
+
+    @api.route('/plain')
+    async def plain(req, res):
+        res.media = {'id': 1, 'name': 'x'}
+
+    return api
+
+
+@pytest.mark.parametrize('accept, media_type', [
+    ('*/*', Media.JSON),
+    ('application/json', Media.JSON),
+    ('application/x-ndjson', Media.NDJSON),
+    ('application/x-ndjson;q=0.5, application/json', Media.JSON),
+    ('text/*', Media.CSV),
+    ('application/*', Media.JSON),
+    # text/html and text/plain are not picked by negotiation.
+    ('text/html, application/xhtml+xml, */*;q=0.8', Media.JSON),
+    # Nothing acceptable: use the default media type.
+    ('image/png', Media.JSON),
+])
+def test_negotiate_media_type(api: API, accept, media_type):
+    response = api.client.get('/', headers={'accept': accept})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == media_type
+    assert response.headers['vary'] == 'Accept'
+
+
+@pytest.mark.parametrize('accept', [
+    Media.CSV,
+    'text/*',
+    Media.NDJSON,
+    'text/csv, application/x-ndjson, */*;q=0.1',
+])
+def test_streaming_media_types_are_not_negotiated_for_non_streams(
+    api: API, accept
+):
+    response = api.client.get('/plain', headers={'accept': accept})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == Media.JSON
+    assert response.json() == {'id': 1, 'name': 'x'}
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({}, {'vary': 'Accept'}),
+    ({'Vary': 'Cookie'}, {'Vary': 'Cookie, Accept'}),
+    ({'VARY': 'accept'}, {'VARY': 'accept'}),
+    ({'vary': 'Accept-Encoding'}, {'vary': 'Accept-Encoding, Accept'}),
+])
+def test_add_vary(headers, expected):
+    _add_vary(headers, 'Accept')
+    assert headers == expected
+
+
+def test_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+    api = API()
+
+    @api.route('/')
+    async def index(req, res):
+        res.media = {'id': 1}
+
+    response = api.client.get('/', headers={'accept': Media.MSGPACK})
+    assert response.headers['content-type'] == Media.MSGPACK
+    assert msgpack.unpackb(response.content, raw=False) == {'id': 1}
+
+
+def test_text_and_html_are_not_negotiated(api: API):
+    @api.route('/text')
+    async def text(req, res):
+        res.text = 'foo'
+
+    response = api.client.get('/text', headers={'accept': Media.JSON})
+    assert response.headers['content-type'] == Media.PLAIN_TEXT
+    assert 'vary' not in response.headers
+
+
+def test_negotiated_media_types_are_cached():
+    media = Media(media_type=Media.JSON)
+    for _ in range(3):
+        assert media.negotiate(Media.NDJSON, stream=True) == Media.NDJSON
+
+    info = media.negotiation_cache_info()
+    assert info.hits == 2
+    assert info.currsize == 1
+
+
+def test_cache_is_invalidated_when_handlers_change(api: API):
+    accept = 'application/x-foo, */*;q=0.1'
+    assert api.client.get('/', headers={'accept': accept}).headers[
+        'content-type'] == Media.JSON
+
+    api.media_handlers['application/x-foo'] = lambda value: 'foo'
+    response = api.client.get('/', headers={'accept': accept})
+    assert response.headers['content-type'] == 'application/x-foo'
+
+    del api.media_handlers['application/x-foo']
+    response = api.client.get('/', headers={'accept': accept})
+    assert response.headers['content-type'] == Media.JSON
+
+
+def test_parse_accept():
+    accept = 'text/*;q=0.5, */*;q=0.1, text/html, application/json;q=0'
+    assert parse_accept(accept) == ['text/html', 'text/*', '*/*']
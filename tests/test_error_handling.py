@@ -57,3 +57,59 @@ def test_custom_error_handler(api: API, exception_cls):
         with pytest.raises(exception_cls):
             api.client.get('/')
         assert not called
+
+
+def test_most_specific_error_handler_is_used(api: API):
+    @api.error_handler(LookupError)
+    def on_lookup_error(req, res, exc):
+        res.text = 'lookup'
+
+    @api.error_handler(Exception)
+    def on_exception(req, res, exc):
+        res.text = 'exception'
+
+    @api.route('/key')
+    def key(req, res):
+        raise KeyError('foo')
+
+    @api.route('/value')
+    def value(req, res):
+        raise ValueError('foo')
+
+    assert api.client.get('/key').text == 'lookup'
+    assert api.client.get('/value').text == 'exception'
+    # HTTP errors are still handled by the built-in handler.
+    assert api.client.get('/unknown').status_code == 404
+
+
+def test_resolved_handlers_are_invalidated_when_handler_added(api: API):
+    @api.route('/')
+    def index(req, res):
+        raise KeyError('foo')
+
+    with pytest.raises(KeyError):
+        api.client.get('/')
+
+    @api.error_handler(KeyError)
+    def on_key_error(req, res, exc):
+        res.text = 'Oops!'
+
+    assert api.client.get('/').text == 'Oops!'
+
+
+def test_custom_not_found_handler(api: API):
+    @api.error_handler(HTTPError)
+    def on_http_error(req, res, exc):
+        res.status_code = exc.status_code
+        res.media = {'error': exc.status_phrase}
+
+    response = api.client.get('/unknown')
+    assert response.status_code == 404
+    assert response.json() == {'error': 'Not Found'}
+
+
+def test_not_found_response(api: API):
+    response = api.client.get('/unknown')
+    assert response.status_code == 404
+    assert response.headers['content-type'] == 'text/html'
+    assert response.text == '<h1>404 Not Found</h1>'
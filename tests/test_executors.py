@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+from bocadillo import API
+from bocadillo.exceptions import HTTPError, RouteDeclarationError
+from bocadillo.executors import ThreadExecutor
+
+
+def _current_thread_name(res):
+    res.text = threading.current_thread().name
+
+
+def test_sync_views_run_in_thread_pool_by_default(api: API):
+    @api.route('/')
+    def index(req, res):
+        _current_thread_name(res)
+
+    assert api.client.get('/').text != threading.main_thread().name
+
+
+def test_inline_executor_runs_on_event_loop_thread(api: API):
+    loop_thread = None
+
+    @api.route('/', executor='inline')
+    def index(req, res):
+        nonlocal loop_thread
+        asyncio.get_event_loop()  # Would fail outside of the loop's thread.
+        loop_thread = threading.current_thread()
+
+    assert api.client.get('/').status_code == 200
+    assert loop_thread is not None
+
+
+def test_api_level_default_executor():
+    api = API(executor='inline')
+    in_loop = None
+
+    @api.route('/')
+    def index(req, res):
+        nonlocal in_loop
+        try:
+            asyncio.get_running_loop()
+            in_loop = True
+        except RuntimeError:
+            in_loop = False
+
+    api.client.get('/')
+    assert in_loop
+
+
+def test_dedicated_thread_pool(api: API):
+    executor = api.add_executor('reports', max_workers=2)
+
+    @api.route('/', executor='reports')
+    def index(req, res):
+        _current_thread_name(res)
+
+    assert api.client.get('/').text.startswith('bocadillo-reports')
+    stats = executor.stats()
+    assert stats.active == 0
+    assert stats.queued == 0
+    assert stats.max_workers == 2
+
+
+def test_class_based_view_methods_use_executor(api: API):
+    api.add_executor('reports', max_workers=1)
+
+    @api.route('/', executor='reports')
+    class Index:
+        def get(self, req, res):
+            _current_thread_name(res)
+
+    assert api.client.get('/').text.startswith('bocadillo-reports')
+
+
+def test_if_executor_unknown_then_error_raised(api: API):
+    with pytest.raises(RouteDeclarationError):
+        @api.route('/', executor='foo')
+        def index(req, res):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_if_queue_full_then_503():
+    executor = ThreadExecutor('test', max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    queued = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0.05)
+
+    stats = executor.stats()
+    assert stats.active == 1
+    assert stats.queued == 1
+
+    with pytest.raises(HTTPError) as ctx:
+        await executor.run(release.wait)
+    assert ctx.value.status_code == 503
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert executor.stats().active == 0
+    executor.shutdown()
@@ -0,0 +1,122 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+from starlette.datastructures import QueryParams
+
+from bocadillo import API
+from bocadillo.json_backends import PREFERRED_BACKENDS, default, get_backend
+
+
+def _installed_backends():
+    for name in PREFERRED_BACKENDS:
+        try:
+            yield get_backend(name)
+        except ImportError:
+            pass
+
+
+@pytest.mark.parametrize('backend', list(_installed_backends()),
+                         ids=lambda backend: backend.name)
+def test_backends_encode_to_bytes(backend):
+    value = {
+        'date': datetime.date(2018, 12, 1),
+        'datetime': datetime.datetime(2018, 12, 1, 10, 30),
+        'uuid': uuid.UUID(int=1),
+        'decimal': decimal.Decimal('1.10'),
+        'text': 'héllo',
+    }
+    encoded = backend.dumps(value)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == {
+        'date': '2018-12-01',
+        'datetime': '2018-12-01T10:30:00',
+        'uuid': '00000000-0000-0000-0000-000000000001',
+        'decimal': '1.10',
+        'text': 'héllo',
+    }
+
+
+def test_dataclasses_are_converted_to_dicts():
+    dataclasses = pytest.importorskip('dataclasses')
+    Point = dataclasses.make_dataclass('Point', ['x', 'y'])
+    assert default(Point(x=1, y=2)) == {'x': 1, 'y': 2}
+
+
+@pytest.mark.parametrize('backend', list(_installed_backends()),
+                         ids=lambda backend: backend.name)
+def test_mappings_are_converted_to_dicts(backend):
+    form = QueryParams(items=[('name', 'Bocadillo'), ('tag', 'a')])
+    assert json.loads(backend.dumps({'form': form})) == {
+        'form': {'name': 'Bocadillo', 'tag': 'a'}
+    }
+
+
+def test_default_backend_is_fastest_installed():
+    assert get_backend().name == next(_installed_backends()).name
+
+
+@pytest.mark.parametrize('backend', list(_installed_backends()),
+                         ids=lambda backend: backend.name)
+def test_backends_encode_to_compact_utf8(backend):
+    assert backend.dumps({'a': 'é', 'b': [1, 2]}) == (
+        '{"a":"é","b":[1,2]}'.encode()
+    )
+
+
+def test_stdlib_backend_is_always_available():
+    assert get_backend('json').dumps([1]) == b'[1]'
+
+
+def test_if_backend_unknown_then_error_raised():
+    with pytest.raises(ValueError):
+        get_backend('foo')
+
+
+def test_if_value_not_serializable_then_type_error_raised():
+    with pytest.raises(TypeError):
+        default(object())
+
+
+def test_media_uses_json_backend(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.media = {'id': uuid.UUID(int=1)}
+
+    response = api.client.get('/')
+    assert response.json() == {'id': '00000000-0000-0000-0000-000000000001'}
+
+
+@pytest.mark.parametrize('value', [
+    {1: 'a', 2.5: 'b', False: 'c', None: 'd'},
+    2 ** 70,
+    -2 ** 70,
+    {'big': [2 ** 64, 1]},
+    {1: 2 ** 100},
+    {'prices': [decimal.Decimal('1.10')], 'nested': {True: None}},
+])
+@pytest.mark.parametrize('backend', list(_installed_backends()),
+                         ids=lambda backend: backend.name)
+def test_backends_have_stdlib_parity(backend, value):
+    expected = json.loads(json.dumps(value, default=default))
+    assert json.loads(backend.dumps(value)) == expected
+
+
+def test_non_str_keys_in_response(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.media = {1: 'a', 'big': 2 ** 70}
+
+    response = api.client.get('/')
+    assert response.status_code == 200
+    assert response.json() == {'1': 'a', 'big': 2 ** 70}
+
+
+@pytest.mark.parametrize('value', [object(), {(1, 2): 'a'}])
+@pytest.mark.parametrize('backend', list(_installed_backends()),
+                         ids=lambda backend: backend.name)
+def test_backends_raise_type_error_if_not_serializable(backend, value):
+    with pytest.raises(TypeError):
+        backend.dumps(value)
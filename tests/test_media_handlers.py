@@ -4,6 +4,8 @@ import pytest
 
 from bocadillo import API, Media
 from bocadillo.exceptions import UnsupportedMediaType
+from bocadillo.json_backends import backend as json_backend
+from bocadillo.media import CSVHandler, NDJSONHandler
 
 
 def test_defaults_to_json(api: API):
@@ -28,7 +30,7 @@ def test_media_type_is_accessible_on_api(api: API):
 
 
 @pytest.mark.parametrize('media_type, expected_text', [
-    (Media.JSON, json.dumps),
+    (Media.JSON, lambda value: json_backend.dumps(value).decode()),
     (Media.PLAIN_TEXT, str),
     (Media.HTML, str),
 ])
@@ -70,3 +72,97 @@ def test_if_media_type_not_supported_then_setting_it_raises_error(api: API):
 
     with pytest.raises(UnsupportedMediaType):
         API(media_type='application/foo')
+
+
+def test_iterators_are_streamed_as_json_array(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.media = ({'id': i} for i in range(3))
+
+    response = api.client.get('/')
+    assert response.headers['content-type'] == Media.JSON
+    assert 'content-length' not in response.headers
+    assert response.json() == [{'id': 0}, {'id': 1}, {'id': 2}]
+
+
+def test_async_iterables_are_streamed_as_json_array(api: API):
+    @api.route('/')
+    async def index(req, res):
+        async def items():
+            for i in range(3):
+                yield i
+
+        res.media = items()
+
+    assert api.client.get('/').json() == [0, 1, 2]
+
+
+def test_empty_stream_is_empty_json_array(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.media = iter([])
+
+    assert api.client.get('/').json() == []
+
+
+@pytest.mark.parametrize('media_type, parse, expected', [
+    (Media.NDJSON, lambda text: [json.loads(line) for line in text.splitlines()],
+     [{'id': 0}, {'id': 1}]),
+    (Media.CSV, str.splitlines, ['id', '0', '1']),
+])
+def test_streaming_media_types(api: API, media_type, parse, expected):
+    api.media_type = media_type
+
+    @api.route('/')
+    async def index(req, res):
+        res.media = ({'id': i} for i in range(2))
+
+    response = api.client.get('/')
+    assert response.headers['content-type'] == media_type
+    assert parse(response.text) == expected
+
+
+def test_small_items_are_batched_into_chunks():
+    handler = NDJSONHandler(chunk_size=10)
+    chunks = list(handler(iter(range(10))))
+    assert b''.join(chunks) == b''.join(b'%d\n' % i for i in range(10))
+    assert [len(chunk) for chunk in chunks] == [10, 10]
+    assert list(CSVHandler()(iter([]))) == []
+
+
+def test_csv_rows_are_written_under_their_columns():
+    rows = [
+        {'id': 1, 'name': 'a'},
+        {'name': 'b', 'id': 2},
+        {'id': 3},
+        {'id': 4, 'name': 'd', 'extra': 'x'},
+    ]
+    encoded = b''.join(CSVHandler()(iter(rows)))
+    assert encoded.decode().splitlines() == [
+        'id,name', '1,a', '2,b', '3,', '4,d'
+    ]
+
+
+def test_csv_restval_and_extrasaction():
+    handler = CSVHandler(restval='-', extrasaction='raise')
+    encoded = b''.join(handler(iter([{'id': 1, 'name': 'a'}, {'id': 2}])))
+    assert encoded.decode().splitlines() == ['id,name', '1,a', '2,-']
+    with pytest.raises(ValueError):
+        b''.join(handler(iter([{'id': 1}, {'id': 2, 'name': 'b'}])))
+
+
+@pytest.mark.asyncio
+async def test_csv_header_is_specific_to_each_stream():
+    handler = CSVHandler(chunk_size=1)
+
+    async def rows():
+        yield {'b': 2, 'a': 1}
+        yield {'a': 3, 'b': 4}
+
+    first = handler(iter([{'a': 1, 'b': 2}, {'b': 4, 'a': 3}]))
+    first_chunk = next(first)
+    second = [chunk async for chunk in handler(rows())]
+    assert (first_chunk + b''.join(first)).decode().splitlines() == [
+        'a,b', '1,2', '3,4'
+    ]
+    assert b''.join(second).decode().splitlines() == ['b,a', '2,1', '4,3']
@@ -0,0 +1,103 @@
+import json
+import threading
+
+import pytest
+
+from bocadillo import API, Media
+from bocadillo.media import DEFAULT_OFFLOAD_THRESHOLD, estimate_size
+
+
+def _thread_name_handler(value):
+    return threading.current_thread().name
+
+
+@pytest.mark.parametrize('size, offloaded', [
+    (10, False),
+    (DEFAULT_OFFLOAD_THRESHOLD, True),
+])
+def test_large_values_are_serialized_in_thread_pool(api: API, size, offloaded):
+    @api.route('/')
+    async def index(req, res):
+        res.media = 'x' * size
+
+    api.media_handlers[Media.JSON] = _thread_name_handler
+    response = api.client.get('/')
+    assert (response.text != threading.main_thread().name) is offloaded
+
+    stats = api.media_offload_stats()
+    assert stats.offloaded == int(offloaded)
+    assert stats.inline == int(not offloaded)
+
+
+@pytest.mark.parametrize('threshold, offloaded', [
+    (None, False),
+    (0, True),
+])
+def test_per_handler_threshold(api: API, threshold, offloaded):
+    @api.route('/')
+    async def index(req, res):
+        res.media = {'id': 1}
+
+    def handle_json(value):
+        return json.dumps(value)
+
+    handle_json.offload_threshold = threshold
+    api.media_handlers[Media.JSON] = handle_json
+    api.client.get('/')
+
+    assert api.media_offload_stats().offloaded == int(offloaded)
+
+
+def test_serialization_errors_are_handled(api: API):
+    @api.error_handler(TypeError)
+    def on_type_error(req, res, exc):
+        res.status_code = 500
+        res.text = 'Not serializable'
+
+    @api.route('/')
+    async def index(req, res):
+        res.media = {'value': object()}
+
+    response = api.client.get('/')
+    assert response.status_code == 500
+    assert response.text == 'Not serializable'
+
+
+def test_content_is_serialized_when_accessed(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.media = [1, 2]
+        assert json.loads(res.content) == [1, 2]
+        res.content = b'overridden'
+
+    assert api.client.get('/').text == 'overridden'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('abc', 3),
+    ([], 2),
+    (['ab'] * 10, 30),
+    ({'ab': 'cd'}, 8),
+    ([{'ab': 'cd'}] * 10, 90),
+])
+def test_estimate_size(value, expected):
+    assert estimate_size(value) == expected
+
+
+@pytest.mark.parametrize('threshold', [None, 0])
+def test_serialization_error_handler_may_only_set_status(
+    api: API, threshold
+):
+    api.media_handlers[Media.JSON].offload_threshold = threshold
+
+    @api.error_handler(TypeError)
+    def on_type_error(req, res, exc):
+        res.status_code = 500
+
+    @api.route('/')
+    async def index(req, res):
+        res.media = {'value': object()}
+
+    response = api.client.get('/')
+    assert response.status_code == 500
+    assert response.content == b''
@@ -125,3 +125,85 @@ def test_errors_raised_in_before_are_caught(api: API, when):
 
     response = api.client.get('/')
     assert response.status_code == 200
+
+
+def test_callbacks_of_multiple_middleware_are_called_in_order(api: API):
+    calls = []
+
+    def build(name):
+        class Recorder(RoutingMiddleware):
+            async def before_dispatch(self, req):
+                calls.append(f'{name}.before')
+
+            def after_dispatch(self, req, res):
+                calls.append(f'{name}.after')
+
+        return Recorder
+
+    class BeforeOnly(RoutingMiddleware):
+        def before_dispatch(self, req):
+            calls.append('before_only.before')
+
+    api.add_middleware(build('first'))
+    api.add_middleware(BeforeOnly)
+    api.add_middleware(build('last'))
+
+    @api.route('/')
+    async def index(req, res):
+        calls.append('view')
+
+    api.client.get('/')
+    assert calls == [
+        'last.before',
+        'before_only.before',
+        'first.before',
+        'view',
+        'last.after',
+        'first.after',
+    ]
+
+
+def test_overridden_dispatch_is_called(api: API):
+    calls = []
+
+    def build(name):
+        class Recorder(RoutingMiddleware):
+            async def before_dispatch(self, req):
+                calls.append(f'{name}.before')
+
+            async def after_dispatch(self, req, res):
+                calls.append(f'{name}.after')
+
+        return Recorder
+
+    class Timing(RoutingMiddleware):
+        async def dispatch(self, request, before=(), after=()):
+            calls.append('timing.start')
+            response = await super().dispatch(request, before, after)
+            calls.append('timing.end')
+            response.headers['x-timing'] = 'ok'
+            return response
+
+        async def before_dispatch(self, req):
+            calls.append('timing.before')
+
+    api.add_middleware(build('first'))
+    api.add_middleware(Timing)
+    api.add_middleware(build('last'))
+
+    @api.route('/')
+    async def index(req, res):
+        calls.append('view')
+
+    response = api.client.get('/')
+    assert response.headers['x-timing'] == 'ok'
+    assert calls == [
+        'timing.start',
+        'last.before',
+        'timing.before',
+        'first.before',
+        'view',
+        'last.after',
+        'first.after',
+        'timing.end',
+    ]
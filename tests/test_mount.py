@@ -1 +1,68 @@
-# TODO
+import pytest
+
+from bocadillo import API
+from bocadillo.compat import is_wsgi_app
+
+
+def wsgi_app(text: str):
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [f'{text}:{environ["PATH_INFO"]}'.encode()]
+
+    return app
+
+
+def asgi_app(text: str):
+    def app(scope):
+        async def asgi(receive, send):
+            body = f'{text}:{scope["path"]}'.encode()
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [[b'content-type', b'text/plain']],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+
+        return asgi
+
+    return app
+
+
+@pytest.mark.parametrize('app', [wsgi_app('foo'), asgi_app('foo')])
+def test_mount_app(api: API, app):
+    api.mount('/foo', app)
+
+    response = api.client.get('/foo/bar')
+    assert response.status_code == 200
+    assert response.text == 'foo:/bar'
+
+
+def test_longest_prefix_wins(api: API):
+    api.mount('/foo', asgi_app('foo'))
+    api.mount('/foo/bar', asgi_app('bar'))
+    api.mount('/', asgi_app('root'))
+
+    assert api.client.get('/foo/bar/baz').text == 'bar:/baz'
+    assert api.client.get('/foo/baz').text == 'foo:/baz'
+    assert api.client.get('/baz').text == 'root:/baz'
+
+
+def test_prefix_only_matches_whole_segments(api: API):
+    api.mount('/foo', asgi_app('foo'))
+
+    @api.route('/foobar')
+    def foobar(req, res):
+        res.text = 'foobar'
+
+    assert api.client.get('/foobar').text == 'foobar'
+
+
+def test_trailing_slash_in_prefix_is_ignored(api: API):
+    api.mount('/foo/', asgi_app('foo'))
+    assert api.client.get('/foo/bar').text == 'foo:/bar'
+
+
+def test_wsgi_apps_are_detected():
+    assert is_wsgi_app(wsgi_app('foo'))
+    assert not is_wsgi_app(asgi_app('foo'))
+    assert not is_wsgi_app(API())
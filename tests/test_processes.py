@@ -0,0 +1,128 @@
+import os
+import threading
+
+import pytest
+
+from bocadillo import API
+from bocadillo.exceptions import RouteDeclarationError
+from bocadillo.processes import ResponseRecorder, process_bound
+
+# NOTE: process-bound views and hooks must be importable by worker processes,
+# so they are declared at the module level.
+process_api = API()
+process_api.add_executor('workers', max_workers=1, processes=True)
+
+
+def _set_pid_header(req, res, params, header='x-hook-pid'):
+    res.headers[header] = str(os.getpid())
+
+
+@process_api.route('/pid', executor='workers')
+def pid(req, res):
+    res.media = {'pid': os.getpid()}
+
+
+@process_api.route('/square/{x:int}')
+@process_bound
+def square(req, res, x: int):
+    res.status_code = 201
+    res.media = {'square': x ** 2, 'pid': os.getpid()}
+
+
+@process_api.route('/echo', methods=['post'], executor='workers')
+def echo(req, res):
+    res.text = req.body.decode() + req.query_params['suffix']
+
+
+@process_api.route('/hooked')
+@process_api.before(process_bound(_set_pid_header), header='x-pid')
+async def hooked(req, res):
+    res.text = 'OK'
+
+
+@process_api.route('/stream', executor='workers')
+def stream(req, res):
+    res.stream = iter(['foo'])
+
+
+@process_api.route('/cbv', executor='workers')
+class ClassBasedView:
+    def get(self, req, res):
+        res.media = {'pid': os.getpid()}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def shutdown_executors():
+    yield
+    process_api.shutdown_executors()
+
+
+def test_views_run_in_worker_process():
+    response = process_api.client.get('/pid')
+    assert response.status_code == 200
+    assert response.json()['pid'] != os.getpid()
+
+
+def test_process_bound_view_uses_process_executor():
+    response = process_api.client.get('/square/3')
+    assert response.status_code == 201
+    assert response.json()['square'] == 9
+    assert response.json()['pid'] != os.getpid()
+
+
+def test_worker_receives_request_snapshot():
+    response = process_api.client.post('/echo?suffix=!', data='hello')
+    assert response.text == 'hello!'
+
+
+def test_process_bound_hook():
+    response = process_api.client.get('/hooked')
+    assert response.text == 'OK'
+    assert int(response.headers['x-pid']) != os.getpid()
+
+
+def test_class_based_view_runs_in_worker_process():
+    response = process_api.client.get('/cbv')
+    assert response.json()['pid'] != os.getpid()
+
+
+def test_streams_cannot_be_returned_from_worker_process():
+    with pytest.raises(TypeError, match="streams can't be returned"):
+        process_api.client.get('/stream')
+
+
+def test_response_recorder_rejects_unrecorded_attributes():
+    res = ResponseRecorder()
+    res.status_code = 201
+    res.media = {'foo': 'bar'}
+    with pytest.raises(TypeError):
+        res.request = None
+    assert res.changes == [('media', {'foo': 'bar'})]
+
+
+def test_if_no_process_executor_then_error_raised(api: API):
+    del api.executors['process']
+
+    with pytest.raises(RouteDeclarationError):
+        @api.route('/')
+        @process_bound
+        def index(req, res):
+            pass
+
+
+def test_executors_are_shut_down_on_lifespan_shutdown(api: API):
+    executor = api.add_executor('workers', max_workers=1, processes=True)
+    shutdown_thread = None
+
+    def shutdown():
+        nonlocal shutdown_thread
+        shutdown_thread = threading.current_thread()
+
+    executor.shutdown = shutdown
+
+    with api.client:
+        pass
+
+    # Executors are shut down outside of the event loop's thread.
+    assert shutdown_thread is not None
+    assert shutdown_thread is not threading.current_thread()
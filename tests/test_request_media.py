@@ -0,0 +1,105 @@
+import pytest
+
+from bocadillo import API, Media
+
+
+def test_parse_json(api: API):
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        res.media = await req.media()
+
+    response = api.client.post('/', json={'message': 'hello'})
+    assert response.json() == {'message': 'hello'}
+
+
+def test_parse_form(api: API):
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        form = await req.media()
+        res.media = {'name': form['name'], 'tags': form.getlist('tag')}
+
+    response = api.client.post('/', data={'name': 'Bocadillo', 'tag': ['a', 'b']})
+    assert response.json() == {'name': 'Bocadillo', 'tags': ['a', 'b']}
+
+
+def test_form_can_be_sent_back_as_media(api: API):
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        res.media = await req.media()
+
+    response = api.client.post('/', data={'name': 'Bocadillo', 'tag': 'a'})
+    assert response.json() == {'name': 'Bocadillo', 'tag': 'a'}
+
+
+def test_body_is_parsed_once(api: API):
+    calls = 0
+
+    def decode_json(body: bytes):
+        nonlocal calls
+        calls += 1
+        return {'calls': calls}
+
+    api.media_decoders[Media.JSON] = decode_json
+
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        await req.media()
+        res.media = await req.media()
+
+    response = api.client.post('/', json={})
+    assert response.json() == {'calls': 1}
+
+
+def test_custom_decoder(api: API):
+    api.media_decoders['text/csv'] = lambda body: body.decode().split(',')
+
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        res.media = await req.media()
+
+    response = api.client.post('/', data='a,b',
+                               headers={'content-type': 'text/csv; charset=utf-8'})
+    assert response.json() == ['a', 'b']
+
+
+@pytest.mark.parametrize('content_type, body, status', [
+    ('application/x-foo', 'foo', 415),
+    ('application/json', '{"oops', 400),
+])
+def test_invalid_media(api: API, content_type, body, status):
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        await req.media()
+
+    response = api.client.post('/', data=body,
+                               headers={'content-type': content_type})
+    assert response.status_code == status
+
+
+def test_if_content_length_too_large_then_413():
+    api = API(max_body_size=4)
+
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        await req.media()
+
+    assert api.client.post('/', json=[1]).status_code == 200
+    assert api.client.post('/', json=[1, 2, 3]).status_code == 413
+
+
+def test_if_streamed_body_too_large_then_413():
+    api = API(max_body_size=4)
+    received = []
+
+    @api.route('/', methods=['post'])
+    async def index(req, res):
+        async for chunk in req.stream():
+            received.append(chunk)
+
+    def chunks():
+        yield b'123'
+        yield b'456'
+        yield b'789'
+
+    assert api.client.post('/', data=chunks()).status_code == 413
+    assert received == [b'123']
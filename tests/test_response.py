@@ -68,3 +68,34 @@ def test_last_response_setter_called_has_priority(builder):
     response = builder.api.client.get('/')
     assert response.headers['Content-Type'] == 'application/json'
     assert response.json() == {'foo': 'bar'}
+
+
+def test_content_length_is_set(api: API):
+    @api.route('/')
+    def index(req, res):
+        res.text = 'héllo'
+
+    response = api.client.get('/')
+    assert response.headers['content-length'] == str(len('héllo'.encode()))
+
+
+def test_header_names_are_case_insensitive(api: API):
+    @api.route('/')
+    def index(req, res):
+        res.headers['Content-Type'] = 'text/csv'
+        res.content = b'a,b'
+
+    response = api.client.get('/')
+    assert response.headers['content-type'] == 'text/csv'
+    assert response.text == 'a,b'
+
+
+def test_response_attributes_are_fixed(api: API):
+    @api.route('/')
+    def index(req, res):
+        try:
+            res.foo = 'bar'
+        except AttributeError:
+            res.text = 'OK'
+
+    assert api.client.get('/').text == 'OK'
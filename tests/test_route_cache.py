@@ -0,0 +1,98 @@
+import pytest
+
+from bocadillo import API
+from bocadillo.cache import LRUCache
+
+
+@pytest.fixture
+def api():
+    return API(route_cache_size=2)
+
+
+def test_resolutions_are_cached(api: API):
+    @api.route('/items/{pk:int}')
+    def item(req, res, pk):
+        res.media = {'pk': pk}
+
+    assert api.client.get('/items/1').json() == {'pk': 1}
+    assert api.client.get('/items/1').json() == {'pk': 1}
+
+    info = api.route_cache_info()['found']
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_not_found_paths_are_cached_separately(api: API):
+    @api.route('/')
+    def index(req, res):
+        pass
+
+    api.client.get('/')
+    for path in '/a', '/b', '/c', '/a':
+        assert api.client.get(path).status_code == 404
+
+    info = api.route_cache_info()
+    assert info['found'].currsize == 1
+    assert info['not_found'].currsize == 2
+
+    api.client.get('/')
+    assert api.route_cache_info()['found'].hits == 1
+
+
+def test_cache_statistics_count_each_path_once(api: API):
+    @api.route('/')
+    def index(req, res):
+        pass
+
+    for path in '/', '/', '/a', '/a':
+        api.client.get(path)
+
+    info = api.route_cache_info()
+    assert (info['found'].hits, info['found'].misses) == (1, 1)
+    assert (info['not_found'].hits, info['not_found'].misses) == (1, 1)
+
+
+def test_cache_is_invalidated_when_route_is_added(api: API):
+    assert api.client.get('/foo').status_code == 404
+
+    @api.route('/foo')
+    def foo(req, res):
+        pass
+
+    assert api.client.get('/foo').status_code == 200
+
+
+def test_cache_is_invalidated_when_app_is_mounted(api: API):
+    @api.route('/')
+    def index(req, res):
+        pass
+
+    api.client.get('/')
+    assert api.route_cache_info()['found'].currsize == 1
+
+    api.mount('/other', API())
+    assert api.route_cache_info()['found'].currsize == 0
+
+
+def test_cache_is_disabled_by_default():
+    api = API()
+
+    @api.route('/')
+    def index(req, res):
+        pass
+
+    api.client.get('/')
+    api.client.get('/')
+    assert api.route_cache_info()['found'].currsize == 0
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.info().currsize == 2
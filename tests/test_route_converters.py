@@ -0,0 +1,116 @@
+from uuid import UUID
+
+import pytest
+
+from bocadillo import API
+from bocadillo.exceptions import RouteDeclarationError
+
+
+@pytest.mark.parametrize('spec, path, expected', [
+    ('int', '/42', 42),
+    ('d', '/-3', -3),
+    ('float', '/1.5', 1.5),
+    ('f', '/2', 2.0),
+    ('str', '/foo', 'foo'),
+    ('slug', '/hello-world_1', 'hello-world_1'),
+    (
+        'uuid',
+        '/12345678-1234-5678-1234-567812345678',
+        UUID('12345678-1234-5678-1234-567812345678'),
+    ),
+])
+def test_builtin_converters(api: API, spec, path, expected):
+    values = []
+
+    @api.route(f'/{{value:{spec}}}')
+    def view(req, res, value):
+        values.append(value)
+
+    assert api.client.get(path).status_code == 200
+    assert values == [expected]
+
+
+@pytest.mark.parametrize('spec, path', [
+    ('int', '/foo'),
+    ('float', '/foo'),
+    ('slug', '/hello%20world'),
+    ('uuid', '/12345678'),
+])
+def test_if_value_does_not_match_converter_then_404(api: API, spec, path):
+    @api.route(f'/{{value:{spec}}}')
+    def view(req, res, value):
+        pass
+
+    assert api.client.get(path).status_code == 404
+
+
+def test_path_converter_spans_segments(api: API):
+    @api.route('/files/{filepath:path}')
+    def view(req, res, filepath):
+        res.text = filepath
+
+    response = api.client.get('/files/docs/2018/report.pdf')
+    assert response.status_code == 200
+    assert response.text == 'docs/2018/report.pdf'
+
+
+def test_register_custom_converter(api: API):
+    @api.converter('year', r'\d{4}')
+    def to_year(value):
+        return int(value)
+
+    @api.route('/archive/{year:year}')
+    def archive(req, res, year):
+        res.media = {'year': year}
+
+    assert api.client.get('/archive/2018').json() == {'year': 2018}
+    assert api.client.get('/archive/18').status_code == 404
+
+
+def test_if_conversion_raises_value_error_then_404(api: API):
+    def to_even(value):
+        value = int(value)
+        if value % 2:
+            raise ValueError
+        return value
+
+    api.add_converter('even', r'\d+', to_even)
+
+    @api.route('/{value:even}')
+    def view(req, res, value):
+        pass
+
+    assert api.client.get('/2').status_code == 200
+    assert api.client.get('/3').status_code == 404
+
+
+def test_if_converter_unknown_then_error_raised(api: API):
+    with pytest.raises(RouteDeclarationError):
+        @api.route('/{value:foo}')
+        def view(req, res, value):
+            pass
+
+
+def test_url_for_route_with_converters(api: API):
+    @api.route('/items/{pk:int}', name='item')
+    def item(req, res, pk):
+        pass
+
+    assert api.url_for('item', pk=42) == '/items/42'
+
+
+@pytest.mark.parametrize('pattern', [
+    '/{user-id}',
+    '/{0}',
+    '/{a.b}',
+    '/{a[0]}',
+    '/{x}/{x}',
+    '/{x}-{x:int}',
+    '/{x!r}',
+    '/{x!s:int}',
+])
+def test_if_parameter_invalid_then_error_raised(api: API, pattern):
+    with pytest.raises(RouteDeclarationError):
+        @api.route(pattern)
+        def view(req, res, **kwargs):
+            pass
@@ -173,3 +173,68 @@ def test_before_does_not_run_if_method_not_allowed(api: API):
 
         response = api.client.put('/foo')
         assert response.status_code == 405
+
+
+def test_multiple_hooks_are_called_in_declaration_order(api: API):
+    calls = []
+
+    def hook(name):
+        async def record(req, res, params):
+            calls.append(name)
+
+        return record
+
+    @api.before(hook('before 1'))
+    @api.before(hook('before 2'))
+    @api.after(hook('after 1'))
+    @api.after(hook('after 2'))
+    @api.route('/foo')
+    class Foo:
+        @api.before(hook('method before'))
+        @api.after(hook('method after'))
+        async def get(self, req, res):
+            calls.append('view')
+
+    api.client.get('/foo')
+    assert calls == [
+        'before 1',
+        'before 2',
+        'method before',
+        'view',
+        'method after',
+        'after 1',
+        'after 2',
+    ]
+
+
+def test_hook_can_be_async_callable_class(api: API):
+    called = False
+
+    class Hook:
+        async def __call__(self, req, res, params):
+            nonlocal called
+            called = True
+
+    @api.before(Hook())
+    @api.route('/foo')
+    async def foo(req, res):
+        pass
+
+    api.client.get('/foo')
+    assert called
+
+
+def test_hooks_receive_route_parameters(api: API):
+    received = None
+
+    def before(req, res, params):
+        nonlocal received
+        received = params
+
+    @api.before(before)
+    @api.route('/foo/{pk:int}')
+    async def foo(req, res, pk):
+        pass
+
+    api.client.get('/foo/1')
+    assert received == {'pk': 1}
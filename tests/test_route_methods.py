@@ -40,3 +40,26 @@ def test_allowed_method_must_be_valid_http_method(builder: RouteBuilder):
         builder.function_based('/', methods=['foo'])
 
     builder.class_based('/', methods=['bar'])
+
+
+def test_if_method_not_allowed_then_allow_header_is_sent(
+        builder: RouteBuilder):
+    builder.function_based('/', methods=['get', 'post'])
+
+    response = builder.api.client.put('/')
+    assert response.status_code == 405
+    assert response.headers['allow'] == 'GET, POST'
+
+
+def test_allow_header_lists_methods_implemented_by_class_based_view(api: API):
+    @api.route('/')
+    class Index:
+        def get(self, req, res):
+            pass
+
+        def delete(self, req, res):
+            pass
+
+    response = api.client.post('/')
+    assert response.status_code == 405
+    assert response.headers['allow'] == 'GET, DELETE'
@@ -0,0 +1,110 @@
+import pytest
+
+from bocadillo import API
+
+
+def test_literal_segment_has_priority_over_parameter(api: API):
+    @api.route('/items/{name}')
+    def item(req, res, name):
+        res.text = 'item'
+
+    @api.route('/items/new')
+    def new_item(req, res):
+        res.text = 'new'
+
+    assert api.client.get('/items/new').text == 'new'
+    assert api.client.get('/items/foo').text == 'item'
+
+
+def test_typed_parameter_has_priority_over_untyped_parameter(api: API):
+    @api.route('/items/{name}')
+    def by_name(req, res, name):
+        res.text = 'name'
+
+    @api.route('/items/{pk:d}')
+    def by_pk(req, res, pk):
+        res.text = 'pk'
+
+    assert api.client.get('/items/42').text == 'pk'
+    assert api.client.get('/items/foo').text == 'name'
+
+
+def test_falls_back_to_parameter_if_literal_branch_does_not_match(api: API):
+    @api.route('/items/new/form')
+    def form(req, res):
+        res.text = 'form'
+
+    @api.route('/items/{name}/detail')
+    def detail(req, res, name):
+        res.text = name
+
+    assert api.client.get('/items/new/form').text == 'form'
+    assert api.client.get('/items/new/detail').text == 'new'
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/foo/', 200),
+    ('/foo', 404),
+    ('/foo/bar', 404),
+])
+def test_trailing_slash_is_honored(api: API, path, status):
+    @api.route('/foo/')
+    def foo(req, res):
+        pass
+
+    assert api.client.get(path).status_code == status
+
+
+def test_parameter_can_be_part_of_a_segment(api: API):
+    @api.route('/files/{name}.{ext}')
+    def file(req, res, name, ext):
+        res.text = f'{name}|{ext}'
+
+    assert api.client.get('/files/report.pdf').text == 'report|pdf'
+
+
+def test_parameter_does_not_span_multiple_segments(api: API):
+    @api.route('/greet/{person}')
+    def greet(req, res, person):
+        pass
+
+    assert api.client.get('/greet/John/Doe').status_code == 404
+
+
+def test_redeclaring_a_pattern_replaces_the_route(api: API):
+    @api.route('/')
+    def first(req, res):
+        res.text = 'first'
+
+    @api.route('/')
+    def second(req, res):
+        res.text = 'second'
+
+    assert api.client.get('/').text == 'second'
+
+
+def test_parameters_with_different_names_share_a_branch(api: API):
+    @api.route('/items/{id:d}/edit')
+    def edit(req, res, id):
+        res.text = f'edit {id}'
+
+    @api.route('/items/{pk:d}/delete')
+    def delete(req, res, pk):
+        res.text = f'delete {pk}'
+
+    items = api._router._root.literals['items']
+    assert len(items.parameters) == 1
+    assert api.client.get('/items/1/edit').text == 'edit 1'
+    assert api.client.get('/items/2/delete').text == 'delete 2'
+
+
+def test_first_of_equivalent_patterns_wins(api: API):
+    @api.route('/items/{id}')
+    def by_id(req, res, id):
+        res.text = f'id {id}'
+
+    @api.route('/items/{pk}')
+    def by_pk(req, res, pk):
+        res.text = f'pk {pk}'
+
+    assert api.client.get('/items/1').text == 'id 1'
@@ -1,4 +1,10 @@
+import gzip
+import importlib
+
+import pytest
+
 from bocadillo import API, static
+from bocadillo.static import build_static, load_manifest
 
 FILE_DIR = 'js'
 FILE_NAME = 'foo.js'
@@ -57,3 +63,320 @@ def test_mount_extra_static_files_dirs(tmpdir_factory):
     response = api.client.get(f'/assets/{FILE_DIR}/{FILE_NAME}')
     assert response.status_code == 200
     assert response.text == FILE_CONTENTS
+
+
+def _create_static_api(tmpdir_factory) -> API:
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_asset(static_dir)
+    return API(static_dir=str(static_dir))
+
+
+URL = f'/static/{FILE_DIR}/{FILE_NAME}'
+
+
+def test_cache_headers_are_sent(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(URL)
+    assert 'javascript' in response.headers['content-type']
+    assert 'charset=utf-8' in response.headers['content-type']
+    assert response.headers['content-length'] == str(len(FILE_CONTENTS))
+    assert response.headers['accept-ranges'] == 'bytes'
+    assert 'etag' in response.headers
+    assert 'last-modified' in response.headers
+
+
+def test_head_request_has_no_body(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.head(URL)
+    assert response.status_code == 200
+    assert response.headers['content-length'] == str(len(FILE_CONTENTS))
+    assert response.content == b''
+
+
+def test_if_not_get_or_head_then_405(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.post(URL)
+    assert response.status_code == 405
+    assert response.headers['allow'] == 'GET, HEAD'
+
+
+@pytest.mark.parametrize('header', ['etag', 'last-modified'])
+def test_conditional_request_returns_304(tmpdir_factory, header):
+    api = _create_static_api(tmpdir_factory)
+    value = api.client.get(URL).headers[header]
+    request_header = {
+        'etag': 'if-none-match', 'last-modified': 'if-modified-since'
+    }[header]
+    response = api.client.get(URL, headers={request_header: value})
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_if_etag_does_not_match_then_200(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(URL, headers={'if-none-match': '"foo"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('range_, content_range, expected', [
+    ('bytes=0-6', 'bytes 0-6/20', 'console'),
+    ('bytes=8-', 'bytes 8-19/20', 'log("foo!");'),
+    ('bytes=-3', 'bytes 17-19/20', '");'),
+])
+def test_range_request(tmpdir_factory, range_, content_range, expected):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(URL, headers={'range': range_})
+    assert response.status_code == 206
+    assert response.headers['content-range'] == content_range
+    assert response.text == expected
+
+
+def test_if_range_not_satisfiable_then_416(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(URL, headers={'range': 'bytes=100-'})
+    assert response.status_code == 416
+    assert response.headers['content-range'] == 'bytes */20'
+
+
+@pytest.mark.parametrize('range_', [
+    'bytes=abc-', 'bytes=-', 'bytes=5-2', 'bytes=0-6,8-9', 'items=0-6',
+])
+def test_if_range_is_malformed_then_whole_file_is_sent(tmpdir_factory, range_):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(URL, headers={'range': range_})
+    assert response.status_code == 200
+    assert response.text == FILE_CONTENTS
+
+
+@pytest.mark.parametrize('range_', ['bytes=0-', 'bytes=-5'])
+def test_range_on_empty_file_is_not_satisfiable(tmpdir_factory, range_):
+    static_dir = tmpdir_factory.mktemp('static')
+    static_dir.join('empty.txt').write('')
+    api = API(static_dir=str(static_dir))
+    response = api.client.get('/static/empty.txt', headers={'range': range_})
+    assert response.status_code == 416
+    assert response.headers['content-range'] == 'bytes */0'
+
+
+def test_if_range_does_not_match_then_whole_file_is_sent(tmpdir_factory):
+    api = _create_static_api(tmpdir_factory)
+    response = api.client.get(
+        URL, headers={'range': 'bytes=0-6', 'if-range': '"foo"'}
+    )
+    assert response.status_code == 200
+    assert response.text == FILE_CONTENTS
+
+
+def test_small_files_are_cached_in_memory(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    asset = _create_asset(static_dir)
+    api = API(static_dir=None)
+    api.mount('assets', static(str(static_dir)))
+
+    assert api.client.get(f'/assets/{FILE_DIR}/{FILE_NAME}').text == (
+        FILE_CONTENTS
+    )
+    asset.remove()
+    assert api.client.get(f'/assets/{FILE_DIR}/{FILE_NAME}').text == (
+        FILE_CONTENTS
+    )
+
+
+def test_large_files_are_streamed(tmpdir_factory, monkeypatch):
+    # `bocadillo.static` is shadowed by the `static()` helper.
+    module = importlib.import_module('bocadillo.static')
+    monkeypatch.setattr(module, 'MAX_CACHED_FILE_SIZE', 0)
+    monkeypatch.setattr(module, 'CHUNK_SIZE', 4)
+    api = _create_static_api(tmpdir_factory)
+
+    response = api.client.get(URL)
+    assert response.status_code == 200
+    assert response.text == FILE_CONTENTS
+
+    response = api.client.get(URL, headers={'range': 'bytes=2-9'})
+    assert response.status_code == 206
+    assert response.text == FILE_CONTENTS[2:10]
+
+
+def test_build_fingerprinted_copies_and_manifest(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_asset(static_dir)
+
+    manifest = build_static(str(static_dir))
+
+    key = f'{FILE_DIR}/{FILE_NAME}'
+    hashed = manifest[key]
+    assert hashed.startswith(f'{FILE_DIR}/foo.') and hashed.endswith('.js')
+    assert static_dir.join(hashed).read() == FILE_CONTENTS
+    assert load_manifest(str(static_dir)) == manifest
+    # Fingerprinted copies are not fingerprinted again.
+    assert build_static(str(static_dir)) == manifest
+
+
+def test_fingerprinted_files_are_cached_forever(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_asset(static_dir)
+    manifest = build_static(str(static_dir))
+    api = API(static_dir=str(static_dir))
+
+    response = api.client.get(f'/static/{manifest[f"{FILE_DIR}/{FILE_NAME}"]}')
+    assert response.status_code == 200
+    assert response.text == FILE_CONTENTS
+    assert response.headers['cache-control'] == (
+        'public, max-age=31536000, immutable'
+    )
+    assert 'immutable' not in api.client.get(URL).headers['cache-control']
+
+
+@pytest.mark.parametrize('static_root, build, expected', [
+    ('static', False, '/static/js/foo.js'),
+    ('assets', False, '/assets/js/foo.js'),
+    ('static', True, '/static/js/foo.{hash}.js'),
+])
+def test_static_url(tmpdir_factory, static_root, build, expected):
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_asset(static_dir)
+    if build:
+        hashed = build_static(str(static_dir))[f'{FILE_DIR}/{FILE_NAME}']
+        expected = expected.format(hash=hashed.split('.')[1])
+    api = API(static_dir=str(static_dir), static_root=static_root)
+
+    assert api.static_url(f'{FILE_DIR}/{FILE_NAME}') == expected
+    assert api.template_string("{{ static_url('js/foo.js') }}") == expected
+    assert api.client.get(expected).text == FILE_CONTENTS
+
+
+CSS = 'h1 { color: red; }\n' * 100
+
+
+def _create_compressible_asset(static_dir):
+    asset = static_dir.join('styles.css')
+    asset.write(CSS)
+    return asset
+
+
+def test_build_compressed_variants(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_compressible_asset(static_dir)
+    _create_asset(static_dir)  # Too small to be worth compressing.
+
+    manifest = build_static(str(static_dir))
+
+    assert gzip.decompress(static_dir.join('styles.css.gz').read_binary()) == (
+        CSS.encode()
+    )
+    assert static_dir.join(manifest['styles.css'] + '.gz').check()
+    assert not static_dir.join(FILE_DIR, FILE_NAME + '.gz').check()
+    # Variants are not fingerprinted.
+    assert 'styles.css.gz' not in manifest
+
+
+def test_no_compressed_variants(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_compressible_asset(static_dir)
+    build_static(str(static_dir), compress=False)
+    assert not static_dir.join('styles.css.gz').check()
+
+
+@pytest.fixture(params=['gzip', 'br'])
+def brotli(request, monkeypatch):
+    """Build variants with or without brotli, if it is installed."""
+    if request.param == 'br':
+        return pytest.importorskip('brotli')
+    module = importlib.import_module('bocadillo.static')
+    monkeypatch.setattr(module, 'brotli', None)
+    return None
+
+
+@pytest.mark.parametrize('accept_encoding, expected, expected_with_brotli', [
+    ('gzip', 'gzip', 'gzip'),
+    ('gzip, deflate', 'gzip', 'gzip'),
+    ('br;q=0, *', 'gzip', 'gzip'),
+    ('gzip, br', 'gzip', 'br'),
+    ('gzip, br;q=0.5', 'gzip', 'gzip'),
+    ('br', None, 'br'),
+    ('identity', None, None),
+    ('gzip;q=0', None, None),
+    ('*, gzip;q=0', None, 'br'),
+    ('', None, None),
+])
+def test_compressed_variant_is_selected(
+    tmpdir_factory, brotli, accept_encoding, expected, expected_with_brotli
+):
+    if brotli is not None:
+        expected = expected_with_brotli
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_compressible_asset(static_dir)
+    build_static(str(static_dir))
+    api = API(static_dir=str(static_dir))
+
+    response = api.client.get(
+        '/static/styles.css', headers={'accept-encoding': accept_encoding}
+    )
+    assert response.status_code == 200
+    assert response.headers.get('content-encoding') == expected
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert response.headers['content-type'] == 'text/css; charset=utf-8'
+    assert response.text == CSS
+
+
+def test_brotli_variant_is_served(tmpdir_factory):
+    brotli = pytest.importorskip('brotli')
+    static_dir = tmpdir_factory.mktemp('static')
+    _create_compressible_asset(static_dir)
+    build_static(str(static_dir))
+    variant = static_dir.join('styles.css.br').read_binary()
+    assert brotli.decompress(variant) == CSS.encode()
+    api = API(static_dir=str(static_dir))
+
+    response = api.client.get(
+        '/static/styles.css',
+        headers={'accept-encoding': 'br'},
+        stream=True,
+    )
+    assert response.headers['content-encoding'] == 'br'
+    assert response.headers['content-length'] == str(len(variant))
+    assert response.raw.read(decode_content=False) == variant
+
+
+def test_outdated_variant_is_ignored(tmpdir_factory, brotli):
+    static_dir = tmpdir_factory.mktemp('static')
+    asset = _create_compressible_asset(static_dir)
+    build_static(str(static_dir))
+    for variant in static_dir.listdir('styles.css.*'):
+        variant.setmtime(asset.mtime() - 10)
+    api = API(static_dir=str(static_dir))
+
+    response = api.client.get(
+        '/static/styles.css', headers={'accept-encoding': 'gzip, br'}
+    )
+    assert 'content-encoding' not in response.headers
+    assert 'vary' not in response.headers
+
+
+def test_archive_is_served_as_is(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    static_dir.join('archive.tar.gz').write_binary(gzip.compress(b'foo'))
+    api = API(static_dir=str(static_dir))
+
+    response = api.client.get('/static/archive.tar.gz')
+    assert response.headers['content-type'] == 'application/gzip'
+    assert 'content-encoding' not in response.headers
+
+
+def test_build_several_times_with_edits(tmpdir_factory):
+    static_dir = tmpdir_factory.mktemp('static')
+    asset = static_dir.join('app.css')
+    hashed_names = []
+
+    for content in ('a', 'b', 'c'):
+        asset.write(content)
+        manifest = build_static(str(static_dir), compress=False)
+        assert list(manifest) == ['app.css']
+        hashed_names.append(manifest['app.css'])
+
+    # One copy per build, none of which was fingerprinted again.
+    assert len(set(hashed_names)) == 3
+    assert sorted(path.basename for path in static_dir.listdir()) == sorted(
+        ['app.css', 'staticfiles.json', *hashed_names]
+    )
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+from bocadillo import API
+from bocadillo.streaming import send_stream
+
+
+def test_stream_async_generator(api: API):
+    @api.route('/')
+    async def index(req, res):
+        async def numbers():
+            for i in range(3):
+                yield str(i)
+
+        res.stream = numbers()
+
+    response = api.client.get('/')
+    assert response.status_code == 200
+    assert response.text == '012'
+    assert response.headers['content-type'] == 'text/plain'
+    assert 'content-length' not in response.headers
+
+
+def test_stream_sync_iterable(api: API):
+    @api.route('/')
+    def index(req, res):
+        res.headers['content-type'] = 'text/csv'
+        res.stream = (f'{i},{i ** 2}\n'.encode() for i in range(3))
+
+    response = api.client.get('/')
+    assert response.headers['content-type'] == 'text/csv'
+    assert response.text == '0,0\n1,1\n2,4\n'
+
+
+def test_last_of_content_and_stream_has_priority(api: API):
+    @api.route('/')
+    async def index(req, res):
+        res.stream = iter(['foo'])
+        res.text = 'bar'
+
+    assert api.client.get('/').text == 'bar'
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_when_client_disconnects():
+    sent = []
+    disconnected = asyncio.Event()
+    closed = False
+
+    async def chunks():
+        nonlocal closed
+        try:
+            for i in range(1000):
+                yield str(i)
+                await asyncio.sleep(0)
+        finally:
+            closed = True
+
+    async def receive():
+        if not sent:
+            return {'type': 'http.request', 'body': b''}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        if len(sent) == 3:
+            disconnected.set()
+
+    await send_stream(chunks(), receive, send)
+
+    assert closed
+    assert 3 <= len(sent) < 1000
+    assert all(message['more_body'] for message in sent)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('delay', [0, 0.05])
+async def test_sync_generator_is_closed_when_client_disconnects(delay):
+    sent = []
+    disconnected = asyncio.Event()
+    received = []
+    closed = False
+
+    def chunks():
+        nonlocal closed
+        try:
+            for i in range(1000):
+                yield str(i)
+                time.sleep(delay)
+        finally:
+            closed = True
+
+    async def receive():
+        received.append(True)
+        if len(received) == 1:
+            return {'type': 'http.request', 'body': b''}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        disconnected.set()
+
+    await send_stream(chunks(), receive, send)
+
+    assert closed
+    assert len(sent) < 1000
+
+
+def _other_tasks():
+    return asyncio.all_tasks() - {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_if_receive_fails_then_stream_is_closed():
+    closed = False
+
+    async def chunks():
+        nonlocal closed
+        try:
+            while True:
+                yield 'foo'
+                await asyncio.sleep(0)
+        finally:
+            closed = True
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('receive failed')
+
+    async def send(message):
+        pass
+
+    with pytest.raises(RuntimeError):
+        await send_stream(chunks(), receive, send)
+
+    assert closed
+    assert not _other_tasks()
+
+
+@pytest.mark.asyncio
+async def test_no_task_left_running_when_stream_is_complete():
+    sent = []
+
+    async def chunks():
+        yield 'foo'
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await send_stream(chunks(), receive, send)
+
+    assert [message['body'] for message in sent] == [b'foo', b'']
+    assert not _other_tasks()
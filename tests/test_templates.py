@@ -1,6 +1,15 @@
+import asyncio
+
 import pytest
+from jinja2 import Environment
+from starlette.concurrency import run_in_threadpool
+
 from bocadillo import API
 from bocadillo.exceptions import TemplateNotFound
+from bocadillo.fragment_cache import FragmentCache, LocalFragmentCache
+from bocadillo.templates import (
+    compile_templates, get_default_bytecode_cache, stream_template
+)
 from tests.conftest import TemplateWrapper
 
 
@@ -41,3 +50,326 @@ async def test_if_template_does_not_exist_then_not_found_raised(api: API):
 def test_render_by_template_string(api: API):
     html = api.template_string('<h1>{{ title }}</h1>', title='Hello')
     assert html == '<h1>Hello</h1>'
+
+
+def _create_api(templates_dir, cache_dir, **kwargs) -> API:
+    api = API(templates_dir=str(templates_dir), **kwargs)
+    api.templates_bytecode_cache = get_default_bytecode_cache(str(cache_dir))
+    return api
+
+
+@pytest.fixture
+def templates_dir(tmpdir_factory):
+    templates_dir = tmpdir_factory.mktemp('templates')
+    templates_dir.join('hello.html').write('<h1>Hello, {{ name }}!</h1>')
+    return templates_dir
+
+
+def _disable_compilation(monkeypatch):
+    def compile_(*args, **kwargs):
+        raise AssertionError('Template was compiled')
+
+    monkeypatch.setattr(Environment, 'compile', compile_)
+
+
+@pytest.mark.asyncio
+async def test_precompiled_templates_are_not_compiled_again(
+        templates_dir, tmpdir, monkeypatch):
+    cache = get_default_bytecode_cache(str(tmpdir))
+    assert compile_templates([str(templates_dir)], cache) == ['hello.html']
+
+    _disable_compilation(monkeypatch)
+    api = _create_api(templates_dir, tmpdir)
+    html = await api.template('hello.html', name='async')
+    assert html == '<h1>Hello, async!</h1>'
+    api = _create_api(templates_dir, tmpdir)
+    assert api.template_sync('hello.html', name='sync') == '<h1>Hello, sync!</h1>'
+
+
+def test_compile_templates_ignores_other_files(templates_dir, tmpdir):
+    templates_dir.join('logo.png').write_binary(b'\x89PNG\r\n\x1a\n\xff')
+    cache = get_default_bytecode_cache(str(tmpdir))
+    assert compile_templates([str(templates_dir)], cache) == ['hello.html']
+    assert compile_templates(
+        [str(templates_dir)], cache, extensions=['txt']
+    ) == []
+
+
+@pytest.mark.asyncio
+async def test_bytecode_is_shared_across_apis(
+        templates_dir, tmpdir, monkeypatch):
+    first = _create_api(templates_dir, tmpdir)
+    assert await first.template('hello.html', name='a') == '<h1>Hello, a!</h1>'
+
+    _disable_compilation(monkeypatch)
+    second = _create_api(templates_dir, tmpdir)
+    assert await second.template('hello.html', name='b') == '<h1>Hello, b!</h1>'
+
+
+def test_bytecode_cache_can_be_disabled(templates_dir):
+    api = API(templates_dir=str(templates_dir))
+    assert api.templates_bytecode_cache is not None
+    api.templates_bytecode_cache = None
+    assert api.templates_bytecode_cache is None
+    assert api.template_sync('hello.html', name='Bocadillo') == (
+        '<h1>Hello, Bocadillo!</h1>'
+    )
+
+
+@pytest.mark.parametrize('auto_reload, expected', [
+    (True, '<h1>Bye, Bocadillo!</h1>'),
+    (False, '<h1>Hello, Bocadillo!</h1>'),
+])
+def test_templates_auto_reload(templates_dir, tmpdir, auto_reload, expected):
+    api = _create_api(
+        templates_dir, tmpdir, templates_auto_reload=auto_reload
+    )
+    api.template_sync('hello.html', name='Bocadillo')
+
+    template = templates_dir.join('hello.html')
+    template.write('<h1>Bye, {{ name }}!</h1>')
+    template.setmtime(template.mtime() + 10)
+
+    assert api.template_sync('hello.html', name='Bocadillo') == expected
+
+
+@pytest.mark.asyncio
+async def test_render_sync_then_async(templates_dir):
+    api = API(templates_dir=str(templates_dir))
+    assert api.template_sync('hello.html', name='a') == '<h1>Hello, a!</h1>'
+    assert await api.template('hello.html', name='b') == '<h1>Hello, b!</h1>'
+    assert api.template_sync('hello.html', name='c') == '<h1>Hello, c!</h1>'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sync_and_async_rendering(templates_dir):
+    api = API(templates_dir=str(templates_dir))
+    templates_dir.join('list.html').write(
+        '{% for i in items %}<li>{{ i }}</li>{% endfor %}'
+    )
+    items = list(range(100))
+    expected = ''.join(f'<li>{i}</li>' for i in items)
+
+    async def render_async(i):
+        html = await api.template('hello.html', name=i)
+        assert html == f'<h1>Hello, {i}!</h1>'
+        assert await api.template('list.html', items=items) == expected
+
+    def render_sync(i):
+        assert api.template_sync('hello.html', name=i) == (
+            f'<h1>Hello, {i}!</h1>'
+        )
+        assert api.template_sync('list.html', items=items) == expected
+        assert api.template_string('{{ i }}', i=i) == str(i)
+
+    await asyncio.gather(*(
+        render_async(i) if i % 2 else run_in_threadpool(render_sync, i)
+        for i in range(200)
+    ))
+
+
+def test_stream_template(templates_dir):
+    templates_dir.join('list.html').write(
+        '<ul>{% for i in items %}<li>{{ i }}</li>{% endfor %}</ul>'
+    )
+    api = API(templates_dir=str(templates_dir))
+
+    @api.route('/')
+    async def index(req, res):
+        res.headers['content-type'] = 'text/html'
+        res.stream = api.template_stream('list.html', items=range(1000))
+
+    response = api.client.get('/')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/html'
+    assert 'content-length' not in response.headers
+    assert response.text == (
+        '<ul>' + ''.join(f'<li>{i}</li>' for i in range(1000)) + '</ul>'
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_template_does_not_wait_for_whole_render(templates_dir):
+    templates_dir.join('page.html').write(
+        '<head>{{ title }}</head>'
+        '<body>{% for row in rows %}<p>{{ row }}</p>{% endfor %}</body>'
+    )
+    api = API(templates_dir=str(templates_dir))
+    produced = []
+
+    async def rows():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    template = api._templates.get_template('page.html')
+    chunks = stream_template(
+        template, {'title': 'x' * 20, 'rows': rows()}, chunk_size=16
+    )
+    # How rendered text is split into events depends on the Jinja version,
+    # so only check that the head is sent before any row is produced.
+    first = await chunks.__anext__()
+    assert first.startswith(b'<head>' + b'x' * 20)
+    assert b'<p>' not in first
+    assert produced == []
+    rest = b''.join([chunk async for chunk in chunks])
+    assert rest.endswith(b'<p>99</p></body>')
+    assert len(produced) == 100
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size, expected', [
+    (0, [b'a', b'b', b'c', b'd', b'e']),
+    (2, [b'ab', b'cd', b'e']),
+    (10, [b'abcde']),
+])
+async def test_stream_template_chunk_size(api: API, chunk_size, expected):
+    template = api._templates.from_string(
+        '{% for c in chars %}{{ c }}{% endfor %}'
+    )
+    chunks = stream_template(template, {'chars': 'abcde'}, chunk_size)
+    assert [chunk async for chunk in chunks] == expected
+
+
+def test_template_string_is_compiled_once(api: API, monkeypatch):
+    source = '<h1>{{ title }}</h1>'
+    assert api.template_string(source, title='a') == '<h1>a</h1>'
+
+    _disable_compilation(monkeypatch)
+    assert api.template_string(source, title='b') == '<h1>b</h1>'
+    info = api.template_string_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_template_string_cache_evicts_least_recently_used():
+    api = API(template_string_cache_size=2)
+    for source in ('a', 'b', 'a', 'c', 'a'):
+        assert api.template_string(source) == source
+    info = api.template_string_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 3, 2)
+    api.template_string('b')
+    assert api.template_string_cache_info().misses == 4
+
+
+def test_template_string_cache_can_be_disabled():
+    api = API(template_string_cache_size=0)
+    assert api.template_string('{{ x }}', x=1) == '1'
+    assert api.template_string('{{ x }}', x=2) == '2'
+    assert api.template_string_cache_info().currsize == 0
+
+
+@pytest.mark.asyncio
+async def test_template_string_cache_is_thread_safe(api: API):
+    sources = [f'{i}: {{{{ x }}}}' for i in range(10)]
+
+    def render(i):
+        source = sources[i % len(sources)]
+        assert api.template_string(source, x=i) == f'{i % len(sources)}: {i}'
+
+    async def render_async(i):
+        render(i)
+
+    await asyncio.gather(*(
+        run_in_threadpool(render, i) if i % 2 else render_async(i)
+        for i in range(500)
+    ))
+    info = api.template_string_cache_info()
+    assert info.hits + info.misses == 500
+    assert info.currsize == len(sources)
+
+
+CACHED_TEMPLATE = '{% cache key, ttl %}<p>{{ counter() }}</p>{% endcache %}'
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        self.value += 1
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_cache_fragment(templates_dir):
+    templates_dir.join('cached.html').write(CACHED_TEMPLATE)
+    api = API(templates_dir=str(templates_dir))
+    counter = Counter()
+    context = {'key': 'foo', 'ttl': None, 'counter': counter}
+
+    assert await api.template('cached.html', context) == '<p>1</p>'
+    assert await api.template('cached.html', context) == '<p>1</p>'
+    # Fragments are shared by sync and async rendering.
+    assert api.template_sync('cached.html', context) == '<p>1</p>'
+    assert api.template_string(CACHED_TEMPLATE, context) == '<p>1</p>'
+    assert counter.value == 1
+
+    context['key'] = 'bar'
+    assert api.template_sync('cached.html', context) == '<p>2</p>'
+    assert await api.template('cached.html', context) == '<p>2</p>'
+
+
+def test_cache_fragment_without_ttl(api: API):
+    counter = Counter()
+    source = '{% cache "foo" %}{{ counter() }}{% endcache %}'
+    assert api.template_string(source, counter=counter) == '1'
+    assert api.template_string(source, counter=counter) == '1'
+
+
+def test_cached_fragment_expires(api: API, monkeypatch):
+    now = 0
+    monkeypatch.setattr(
+        'bocadillo.fragment_cache.time.monotonic', lambda: now
+    )
+    counter = Counter()
+    context = {'key': 'foo', 'ttl': 10, 'counter': counter}
+
+    assert api.template_string(CACHED_TEMPLATE, context) == '<p>1</p>'
+    now = 9
+    assert api.template_string(CACHED_TEMPLATE, context) == '<p>1</p>'
+    now = 10
+    assert api.template_string(CACHED_TEMPLATE, context) == '<p>2</p>'
+
+
+def test_expired_fragment_is_evicted(monkeypatch):
+    now = 0
+    monkeypatch.setattr(
+        'bocadillo.fragment_cache.time.monotonic', lambda: now
+    )
+    cache = LocalFragmentCache()
+    cache.set('foo', b'<p>1</p>', ttl=10)
+    now = 10
+    assert cache.get('foo') is None
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (0, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_cached_fragment_is_escaped_once(templates_dir):
+    templates_dir.join('escaped.html').write(
+        '{% cache "foo" %}{{ text }}{% endcache %}'
+    )
+    api = API(templates_dir=str(templates_dir))
+    for _ in range(2):
+        html = await api.template('escaped.html', text='<b>')
+        assert html == '&lt;b&gt;'
+
+
+def test_custom_fragment_cache(api: API):
+    class DictCache(FragmentCache):
+        def __init__(self):
+            self.data = {}
+
+        def get(self, key):
+            return self.data.get(key)
+
+        def set(self, key, value, ttl):
+            self.data[key] = value
+
+    cache = DictCache()
+    api.templates_fragment_cache = cache
+    assert api.templates_fragment_cache is cache
+    api.template_string('{% cache "foo" %}héllo{% endcache %}')
+    assert cache.data == {'foo': 'héllo'.encode()}
+    cache.data['foo'] = b'bye'
+    assert api.template_string('{% cache "foo" %}héllo{% endcache %}') == 'bye'